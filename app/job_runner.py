@@ -0,0 +1,111 @@
+import asyncio
+import threading
+import time
+import uuid
+import logging
+from dataclasses import dataclass, field
+from concurrent.futures import Future, CancelledError
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from src.scrapers.captcha_handoff import handoff_owner
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+@dataclass
+class Job:
+    """State of a single background scrape/query job"""
+    job_id: str
+    description: str
+    status: str = PENDING
+    progress: List[str] = field(default_factory=list)
+    result: Any = None
+    error: Optional[str] = None
+    started_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    future: Optional[Future] = field(default=None, repr=False)
+
+    @property
+    def latest_progress(self) -> Optional[str]:
+        return self.progress[-1] if self.progress else None
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished_at or time.time()) - self.started_at
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED, CANCELLED)
+
+class JobRunner:
+    """Runs coroutines on a persistent event loop thread so the Streamlit script never blocks"""
+
+    def __init__(self, max_finished_jobs: int = 100):
+        self.logger = logging.getLogger(__name__)
+        self.max_finished_jobs = max_finished_jobs
+        self.jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, name="cyberscraper-jobs", daemon=True)
+        self._thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro_factory: Callable[[Callable[[str], None]], Awaitable[Any]], description: str = "") -> str:
+        """Schedule `coro_factory(progress_callback)` on the loop and return its job id"""
+        job = Job(job_id=uuid.uuid4().hex, description=description)
+
+        def progress_callback(message: str):
+            job.progress.append(str(message))
+
+        async def run():
+            job.status = RUNNING
+            # Runs in its own task, so CAPTCHA handoffs made by this job (and its subtasks) carry its id
+            handoff_owner.set(job.job_id)
+            return await coro_factory(progress_callback)
+
+        job.future = asyncio.run_coroutine_threadsafe(run(), self.loop)
+        job.future.add_done_callback(lambda future: self._on_done(job, future))
+
+        with self._lock:
+            self.jobs[job.job_id] = job
+            self._prune()
+        return job.job_id
+
+    def run(self, coro_factory: Callable[[Callable[[str], None]], Awaitable[Any]], description: str = "",
+            timeout: Optional[float] = None) -> Any:
+        """Submit a job and block until its result is available"""
+        job = self.get(self.submit(coro_factory, description))
+        return job.future.result(timeout=timeout)
+
+    def _on_done(self, job: Job, future: Future):
+        job.finished_at = time.time()
+        try:
+            job.result = future.result()
+            job.status = DONE
+        except CancelledError:
+            job.status = CANCELLED
+        except Exception as e:
+            job.error = str(e)
+            job.status = FAILED
+            self.logger.error(f"Job {job.job_id} failed: {str(e)}")
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        job = self.get(job_id)
+        if job is None or job.finished:
+            return False
+        # Cancelling the concurrent future also cancels the task running on the loop
+        return job.future.cancel()
+
+    def _prune(self):
+        finished = sorted((job for job in self.jobs.values() if job.finished), key=lambda j: j.finished_at)
+        for job in finished[:max(0, len(finished) - self.max_finished_jobs)]:
+            del self.jobs[job.job_id]
@@ -1,19 +1,34 @@
-import asyncio
 import streamlit as st
 from src.web_extractor import WebExtractor
 from src.scrapers.playwright_scraper import ScraperConfig
+from app.job_runner import JobRunner
 import os
 
+@st.cache_resource(show_spinner=False)
+def get_job_runner() -> JobRunner:
+    return JobRunner()
+
 class StreamlitWebScraperChat:
-    def __init__(self, model_name, scraper_config: ScraperConfig = None):
-        self.web_extractor = WebExtractor(model_name=model_name, scraper_config=scraper_config)
+    def __init__(self, model_name, scraper_config: ScraperConfig = None, chat_id: str = None):
+        self.web_extractor = WebExtractor(model_name=model_name, scraper_config=scraper_config, chat_id=chat_id)
+        self.job_runner = get_job_runner()
 
-    def process_message(self, message: str) -> str:
-        async def process_with_progress():
-            progress_placeholder = st.empty()
-            progress_placeholder.text("Processing...")
-            result = await self.web_extractor.process_query(message, progress_callback=progress_placeholder.text)
-            progress_placeholder.empty()
-            return result
+    @property
+    def last_trace(self):
+        return self.web_extractor.last_trace
+
+    def submit_message(self, message: str) -> str:
+        """Queue the message on the background loop and return the job id to poll"""
+        return self.job_runner.submit(
+            lambda progress_callback: self.web_extractor.process_query(message, progress_callback=progress_callback),
+            description=message
+        )
 
-        return asyncio.run(process_with_progress())
\ No newline at end of file
+    def restore_cached(self, message: str) -> bool:
+        return self.web_extractor.restore_cached(message)
+
+    def process_message(self, message: str) -> str:
+        return self.job_runner.run(
+            lambda progress_callback: self.web_extractor.process_query(message, progress_callback=progress_callback),
+            description=message
+        )
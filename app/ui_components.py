@@ -69,29 +69,33 @@ def format_data(data: Union[str, bytes, io.BytesIO], format_type: str):
             return pd.read_csv(io.BytesIO(data))
         else:
             if format_type == 'csv':
-                csv_data = []
-                csv_reader = csv.reader(io.StringIO(data))
-                for row in csv_reader:
-                    csv_data.append(row)
+                csv_data = list(csv.reader(io.StringIO(data)))
                 
                 if not csv_data:
                     raise ValueError("Empty CSV data")
                 
                 max_columns = max(len(row) for row in csv_data)
                 
-                padded_data = [row + [''] * (max_columns - len(row)) for row in csv_data]
-                
-                headers = padded_data[0]
+                headers = csv_data[0] + [''] * (max_columns - len(csv_data[0]))
                 unique_headers = []
+                seen_headers = set()
                 for i, header in enumerate(headers):
-                    if header == '' or header in unique_headers:
-                        unique_headers.append(f'Column_{i+1}')
-                    else:
-                        unique_headers.append(header)
+                    if header == '' or header in seen_headers:
+                        header = f'Column_{i+1}'
+                    unique_headers.append(header)
+                    seen_headers.add(header)
                 
-                df = pd.DataFrame(padded_data[1:], columns=unique_headers)
+                # pandas pads ragged rows with None while building the frame, so rows are never padded in Python
+                df = pd.DataFrame(csv_data[1:])
+                if df.shape[1] < max_columns:
+                    df = df.reindex(columns=range(max_columns))
+                if any(len(row) != max_columns for row in csv_data):
+                    df = df.fillna('')
+                df.columns = unique_headers
                 
-                df = df.loc[:, (df != '').any(axis=0)]
+                # Stops scanning a column at its first non-empty cell instead of comparing every cell
+                values = df.to_numpy()
+                df = df.loc[:, [any(values[:, i]) for i in range(values.shape[1])]]
                 
                 return df
             elif format_type == 'excel':
@@ -1,5 +1,3 @@
-import time
-import streamlit as st
 import random
 
 def get_loading_message():
@@ -31,27 +29,3 @@ def get_loading_message():
         "Infiltrating the data vaults—high-tech heist underway..."
     ]
     return random.choice(messages)
-
-def loading_animation(process_func, *args, **kwargs):
-    loading_placeholder = st.empty()
-    result = None
-    start_time = time.time()
-    
-    while result is None:
-        elapsed_time = time.time() - start_time
-        if elapsed_time > 30:  # Timeout after 30 seconds
-            loading_placeholder.error("Request timed out. Please try again.")
-            return None
-        
-        loading_message = get_loading_message()
-        
-        with st.spinner(loading_message):
-            try:
-                result = process_func(*args, **kwargs)
-            except Exception as e:
-                loading_placeholder.error(f"An error occurred: {str(e)}. Retrying...")
-                time.sleep(1)
-    
-    loading_placeholder.empty()
-    st.success("Done!")
-    return result
@@ -0,0 +1,110 @@
+"""Measure how much each main-content extraction level shrinks the prompt on the recorded corpus.
+
+For every corpus page, preprocesses the page at each aggressiveness level and reports prompt
+tokens, the reduction relative to "off", and extraction agreement: the share of main-content
+words (the text of the page's <!-- repeat --> block) that survive, plus how many
+lines that are mostly outside it are still sent. The fake LLM echoes prompt lines back as records,
+so the prompt text is exactly what an extraction would return. Words rather than lines are
+compared because tables are rendered one row per line.
+
+Usage:
+    python benchmarks/bench_content_extraction.py
+    python benchmarks/bench_content_extraction.py --scales 1,20 --output extraction.json
+"""
+import argparse
+import json
+import os
+import re
+import sys
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+
+from corpus_server import REPEAT_PATTERN, list_corpus, load_page
+from fake_llm import FAKE_MODEL_NAME, FakeLLM
+from src.web_extractor import WebExtractor
+from src.utils.content_extractor import AGGRESSIVENESS_LEVELS
+
+def make_extractor(level: str) -> WebExtractor:
+    extractor = WebExtractor(model_name=FAKE_MODEL_NAME, content_extraction=level)
+    extractor.model = FakeLLM()
+    return extractor
+
+def content_lines(text: str) -> List[str]:
+    return [line for line in text.splitlines() if line.strip()]
+
+def words(text: str) -> set:
+    return set(re.findall(r"\w+", text.lower()))
+
+def main_content_words(name: str) -> set:
+    with open(list_corpus()[name], encoding='utf-8') as f:
+        match = REPEAT_PATTERN.search(f.read())
+    return words(BeautifulSoup(match.group(1), 'html.parser').get_text(" ")) if match else set()
+
+def is_other_line(line: str, gold: set) -> bool:
+    line_words = words(line)
+    return len(line_words & gold) * 2 < len(line_words)
+
+def run(args) -> Dict:
+    extractors = {level: make_extractor(level) for level in AGGRESSIVENESS_LEVELS}
+    pages = []
+    totals = {level: {"tokens": 0, "main_words": 0, "kept_main_words": 0, "other_lines": 0}
+              for level in AGGRESSIVENESS_LEVELS}
+
+    for name in (args.pages or list(list_corpus())):
+        gold = main_content_words(name)
+        for scale in args.scales:
+            html = load_page(name, scale)
+            levels = {}
+            base_tokens = None
+            for level, extractor in extractors.items():
+                text = extractor._preprocess_content(html)
+                tokens = extractor.num_tokens_from_string(text)
+                kept = words(text) & gold
+                other = [line for line in content_lines(text) if is_other_line(line, gold)]
+                base_tokens = tokens if base_tokens is None else base_tokens
+                levels[level] = {
+                    "tokens": tokens,
+                    "token_reduction": round(1 - tokens / base_tokens, 3) if base_tokens else 0.0,
+                    "agreement": round(len(kept) / len(gold), 3) if gold else 1.0,
+                    "other_lines": len(other),
+                }
+                total = totals[level]
+                total["tokens"] += tokens
+                total["main_words"] += len(gold)
+                total["kept_main_words"] += len(kept)
+                total["other_lines"] += len(other)
+            pages.append({"page": name, "scale": scale, "levels": levels})
+
+    base_total = totals["off"]["tokens"]
+    summary = {
+        level: {
+            "tokens": total["tokens"],
+            "token_reduction": round(1 - total["tokens"] / base_total, 3) if base_total else 0.0,
+            "agreement": round(total["kept_main_words"] / total["main_words"], 3) if total["main_words"] else 1.0,
+            "other_lines": total["other_lines"],
+        }
+        for level, total in totals.items()
+    }
+    return {"scales": args.scales, "summary": summary, "pages": pages}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', type=lambda v: [int(s) for s in v.split(',')], default=[1, 10],
+                        help="Comma-separated repeat factors used to build size variants of each page")
+    parser.add_argument('--pages', type=lambda v: v.split(','), default=None,
+                        help=f"Comma-separated subset of: {', '.join(list_corpus())}")
+    parser.add_argument('--output', help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    output = json.dumps(run(args), indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+"""Offline end-to-end benchmark of the scrape pipeline against the recorded corpus.
+
+Serves benchmarks/corpus over a local HTTP server, runs each page through WebExtractor
+with a deterministic fake LLM, and reports per-stage and per-URL latency percentiles as JSON.
+
+Usage:
+    python benchmarks/bench_pipeline.py                 # plain HTTP fetch, no browser needed
+    python benchmarks/bench_pipeline.py --browser       # fetch through PlaywrightScraper
+    python benchmarks/bench_pipeline.py --scales 1,20 --iterations 10 --output bench.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import urllib.request
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus_server import CorpusServer, list_corpus
+from fake_llm import FAKE_MODEL_NAME, FakeLLM
+from src.web_extractor import WebExtractor
+from src.scrapers.fetch_result import FetchResult
+from src.scrapers.playwright_scraper import ScraperConfig
+from src.utils.resource_pool import content_cache
+from src.utils.tracing import Tracer, get_tracer, set_tracer
+
+DEFAULT_QUERY = "extract all items as csv"
+
+class TraceCollector:
+    def __init__(self):
+        self.traces = []
+
+    def export(self, trace):
+        self.traces.append(trace)
+
+class HTTPFetcher:
+    """Fetches pages with urllib so the pipeline can be measured without a browser"""
+
+    async def fetch_content(self, url: str, proxy: Optional[str] = None, pages: Optional[str] = None,
+                            url_pattern: Optional[str] = None, handle_captcha: bool = False, scroll: bool = False) -> List[FetchResult]:
+        with get_tracer().span("http_fetch", url=url):
+            return [FetchResult(url, content=await asyncio.to_thread(self._get, url), status=200)]
+
+    @staticmethod
+    def _get(url: str) -> str:
+        with urllib.request.urlopen(url) as response:
+            return response.read().decode('utf-8')
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = (len(ordered) - 1) * pct / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+def describe(values_ms: List[float]) -> Dict[str, float]:
+    total_s = sum(values_ms) / 1000
+    return {
+        "count": len(values_ms),
+        "mean_ms": round(sum(values_ms) / len(values_ms), 3) if values_ms else 0.0,
+        "p50_ms": round(percentile(values_ms, 50), 3),
+        "p95_ms": round(percentile(values_ms, 95), 3),
+        "p99_ms": round(percentile(values_ms, 99), 3),
+        "throughput_per_s": round(len(values_ms) / total_s, 2) if total_s else None,
+    }
+
+def reset_extractor(extractor: WebExtractor):
+    content_cache.clear()
+    extractor.query_cache.clear()
+    extractor.api_call_cache.clear()
+    extractor.content_hash = None
+
+async def run(args) -> Dict:
+    collector = TraceCollector()
+    previous_tracer = get_tracer()
+    set_tracer(Tracer([collector]))
+
+    config = ScraperConfig(headless=True, delay_after_load=0, debug=False)
+    extractor = WebExtractor(model_name=FAKE_MODEL_NAME, scraper_config=config)
+    fake_llm = FakeLLM(base_latency=args.llm_latency, latency_per_1k_chars=args.llm_latency_per_1k)
+    extractor.model = fake_llm
+    if not args.browser:
+        extractor.playwright_scraper = HTTPFetcher()
+
+    pages = []
+    try:
+        with CorpusServer() as server:
+            for name in (args.pages or list(list_corpus())):
+                for scale in args.scales:
+                    url = server.url_for(name, scale)
+                    end_to_end_ms = []
+                    calls_before = fake_llm.calls
+                    for _ in range(args.iterations):
+                        reset_extractor(extractor)
+                        start = time.perf_counter()
+                        await extractor.process_query(url)
+                        await extractor.process_query(args.query)
+                        end_to_end_ms.append((time.perf_counter() - start) * 1000)
+                    pages.append({
+                        "page": name,
+                        "scale": scale,
+                        "url": url,
+                        "html_bytes": len(extractor.current_content or ""),
+                        "preprocessed_chars": len(extractor.preprocessed_content or ""),
+                        "llm_calls_per_query": (fake_llm.calls - calls_before) / args.iterations,
+                        "end_to_end": describe(end_to_end_ms),
+                    })
+    finally:
+        set_tracer(previous_tracer)
+
+    stage_durations = defaultdict(list)
+    for trace in collector.traces:
+        stage_durations["process_query"].append(trace.duration_ms)
+        for span in trace.spans:
+            stage_durations[span.name].append(span.duration_ms)
+
+    return {
+        "mode": "browser" if args.browser else "http",
+        "iterations": args.iterations,
+        "scales": args.scales,
+        "query": args.query,
+        "stages": {name: describe(values) for name, values in sorted(stage_durations.items())},
+        "pages": pages,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--browser', action='store_true', help="Fetch through PlaywrightScraper instead of urllib")
+    parser.add_argument('--iterations', type=int, default=5)
+    parser.add_argument('--scales', type=lambda v: [int(s) for s in v.split(',')], default=[1, 10, 50],
+                        help="Comma-separated repeat factors used to build size variants of each page")
+    parser.add_argument('--pages', type=lambda v: v.split(','), default=None,
+                        help=f"Comma-separated subset of: {', '.join(list_corpus())}")
+    parser.add_argument('--query', default=DEFAULT_QUERY)
+    parser.add_argument('--llm-latency', type=float, default=0.0, help="Simulated seconds per LLM call")
+    parser.add_argument('--llm-latency-per-1k', type=float, default=0.0,
+                        help="Simulated extra seconds per 1k prompt characters")
+    parser.add_argument('--output', help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""Compare the legacy per-cell table normalization with the vectorized versions.
+
+Usage: python benchmarks/bench_table_normalization.py --rows 100000
+"""
+import argparse
+import csv
+import io
+import os
+import random
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.ui_components import format_data
+from src.utils.google_sheets_utils import clean_data_for_sheets
+
+def legacy_clean_data_for_sheets(df):
+    def clean_value(val):
+        if pd.isna(val):
+            return ""
+        if isinstance(val, (int, float)):
+            return str(val)
+        return str(val).replace('\n', ' ').replace('\r', '')
+
+    for col in df.columns:
+        df[col] = df[col].map(clean_value)
+
+    if 'comments' in df.columns:
+        df['comments'] = df['comments'].astype(str)
+
+    return df
+
+def legacy_format_csv(data):
+    csv_data = []
+    csv_reader = csv.reader(io.StringIO(data))
+    for row in csv_reader:
+        csv_data.append(row)
+
+    max_columns = max(len(row) for row in csv_data)
+
+    padded_data = [row + [''] * (max_columns - len(row)) for row in csv_data]
+
+    headers = padded_data[0]
+    unique_headers = []
+    for i, header in enumerate(headers):
+        if header == '' or header in unique_headers:
+            unique_headers.append(f'Column_{i+1}')
+        else:
+            unique_headers.append(header)
+
+    df = pd.DataFrame(padded_data[1:], columns=unique_headers)
+
+    df = df.loc[:, (df != '').any(axis=0)]
+
+    return df
+
+def make_frame(rows, seed=0):
+    rng = random.Random(seed)
+    return pd.DataFrame({
+        'name': [f"Item {i}\nline two" if i % 7 == 0 else f"Item {i}" for i in range(rows)],
+        'price': [round(rng.uniform(1, 500), 2) if i % 11 else np.nan for i in range(rows)],
+        'stock': np.arange(rows),
+        'in_stock': [i % 3 == 0 for i in range(rows)],
+        'comments': [None if i % 5 == 0 else f"comment\r{i}" for i in range(rows)],
+    })
+
+def make_csv(rows, seed=0):
+    rng = random.Random(seed)
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(['name', 'price', 'name', '', 'notes', 'empty'])
+    for i in range(rows):
+        row = [f"Item {i}", f"{rng.uniform(1, 500):.2f}", f"Alt {i}", str(i), f"note, {i}" if i % 4 else '', '']
+        # Ragged rows exercise the padding path
+        writer.writerow(row[:rng.randint(3, 6)])
+    return output.getvalue()
+
+def timed(func, *args, repeat=3):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    df = make_frame(args.rows)
+    legacy_time, legacy_result = timed(lambda: legacy_clean_data_for_sheets(df.copy()), repeat=args.repeat)
+    new_time, new_result = timed(lambda: clean_data_for_sheets(df), repeat=args.repeat)
+    assert legacy_result.values.tolist() == new_result.values.tolist(), "clean_data_for_sheets output differs"
+    print(f"clean_data_for_sheets ({args.rows} rows): legacy {legacy_time:.3f}s, "
+          f"vectorized {new_time:.3f}s, speedup {legacy_time / new_time:.1f}x")
+
+    data = make_csv(args.rows)
+    legacy_time, legacy_result = timed(legacy_format_csv, data, repeat=args.repeat)
+    new_time, new_result = timed(format_data, data, 'csv', repeat=args.repeat)
+    pd.testing.assert_frame_equal(legacy_result, new_result, check_dtype=False)
+    print(f"format_data csv ({args.rows} rows): legacy {legacy_time:.3f}s, "
+          f"vectorized {new_time:.3f}s, speedup {legacy_time / new_time:.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+import os
+import re
+import threading
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from typing import Dict, Optional
+from urllib.parse import urlparse, parse_qs
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus')
+REPEAT_PATTERN = re.compile(r'<!-- repeat -->(.*?)<!-- /repeat -->', re.DOTALL)
+
+def list_corpus() -> Dict[str, str]:
+    return {
+        os.path.splitext(name)[0]: os.path.join(CORPUS_DIR, name)
+        for name in sorted(os.listdir(CORPUS_DIR)) if name.endswith('.html')
+    }
+
+def load_page(name: str, scale: int = 1) -> str:
+    """Load a corpus page with its repeat block expanded `scale` times to produce larger variants"""
+    with open(list_corpus()[name], encoding='utf-8') as f:
+        html = f.read()
+    return REPEAT_PATTERN.sub(lambda m: m.group(1) * max(scale, 1), html)
+
+class CorpusRequestHandler(SimpleHTTPRequestHandler):
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        name = parsed.path.strip('/').removesuffix('.html')
+        if name not in list_corpus():
+            self.send_error(404)
+            return
+        scale = int(parse_qs(parsed.query).get('scale', ['1'])[0])
+        body = load_page(name, scale).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class CorpusServer:
+    """Serves the recorded corpus on localhost from a background thread"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0):
+        self.httpd = ThreadingHTTPServer((host, port), CorpusRequestHandler)
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url_for(self, name: str, scale: int = 1) -> str:
+        return f"{self.base_url}/{name}?scale={scale}"
+
+    def __enter__(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
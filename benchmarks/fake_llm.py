@@ -0,0 +1,40 @@
+import asyncio
+import json
+import re
+
+from src.model_registry import OLLAMA_DEFAULT_CAPABILITIES, register_model
+from src.ollama_models import OllamaModel
+
+FAKE_MODEL_NAME = "ollama:bench-fake"
+# Registered so extractors using the fake model never ask a local Ollama server for its context window
+register_model(FAKE_MODEL_NAME, OLLAMA_DEFAULT_CAPABILITIES)
+
+CONTENT_PATTERN = re.compile(r'(?:Preprocessed webpage content|Webpage content):\s*(.*?)\s*(?:Human|User query):', re.DOTALL)
+
+class FakeLLM(OllamaModel):
+    """Deterministic stand-in for a real model: echoes content lines back as JSON records.
+
+    Latency is simulated as a fixed base plus a per-1k-prompt-character cost so that
+    prompt-shrinking changes show up in end-to-end numbers.
+    """
+
+    def __init__(self, base_latency: float = 0.0, latency_per_1k_chars: float = 0.0, max_records: int = 50):
+        super().__init__(FAKE_MODEL_NAME[7:], num_ctx=OLLAMA_DEFAULT_CAPABILITIES.context_window)
+        self.base_latency = base_latency
+        self.latency_per_1k_chars = latency_per_1k_chars
+        self.max_records = max_records
+        self.calls = 0
+        self.prompt_chars = 0
+
+    async def generate(self, prompt: str, system_prompt: str = "") -> str:
+        self.calls += 1
+        self.prompt_chars += len(prompt)
+        delay = self.base_latency + self.latency_per_1k_chars * len(prompt) / 1000
+        if delay:
+            await asyncio.sleep(delay)
+
+        match = CONTENT_PATTERN.search(prompt)
+        content = match.group(1) if match else prompt
+        lines = [line.strip() for line in content.splitlines() if line.strip()]
+        records = [{"index": i, "text": line} for i, line in enumerate(lines[:self.max_records])]
+        return json.dumps(records)
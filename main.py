@@ -1,9 +1,10 @@
 import streamlit as st
 import json
 import asyncio
-from app.streamlit_web_scraper_chat import StreamlitWebScraperChat
+from app.streamlit_web_scraper_chat import StreamlitWebScraperChat, get_job_runner
+from app.job_runner import DONE, CANCELLED
 from app.ui_components import display_info_icons, display_message, extract_data_from_markdown, format_data
-from app.utils import loading_animation, get_loading_message
+from app.utils import get_loading_message
 from datetime import datetime, timedelta
 from src.ollama_models import OllamaModel
 import pandas as pd
@@ -14,10 +15,16 @@ from io import BytesIO
 import re
 from src.utils.google_sheets_utils import SCOPES, get_redirect_uri, display_google_sheets_button, initiate_google_auth
 from src.scrapers.playwright_scraper import ScraperConfig
+from src.scrapers.captcha_handoff import get_captcha_handoffs
+from src.utils.usage_ledger import get_usage_ledger
 import time
 from urllib.parse import urlparse
 import atexit
 import os
+import hashlib
+
+MESSAGES_PER_PAGE = 20
+JOB_POLL_INTERVAL = 0.5
 
 def handle_oauth_callback():
     if 'code' in st.query_params:
@@ -58,19 +65,8 @@ def load_chat_history():
     except FileNotFoundError:
         return {}
 
-def safe_process_message(web_scraper_chat, message):
-    if message is None or message.strip() == "":
-        return "I'm sorry, but I didn't receive any input. Could you please try again?"
+def display_response(response):
     try:
-        progress_placeholder = st.empty()
-        progress_placeholder.text("Initializing scraper...")
-        
-        start_time = time.time()
-        response = web_scraper_chat.process_message(message)
-        end_time = time.time()
-        
-        progress_placeholder.text(f"Scraping completed in {end_time - start_time:.2f} seconds.")
-        
         st.write("Debug: Response type:", type(response))
         
         if isinstance(response, str):
@@ -148,9 +144,57 @@ def safe_process_message(web_scraper_chat, message):
 
         return response
     except Exception as e:
-        st.error(f"An error occurred during scraping: {str(e)}")
+        st.error(f"An error occurred while displaying the response: {str(e)}")
         return f"An unexpected error occurred: {str(e)}. Please try again or contact support if the issue persists."
 
+def display_active_job(active_job):
+    job_runner = get_job_runner()
+    job = job_runner.get(active_job["job_id"])
+    if job is None:
+        del st.session_state.active_job
+        return
+
+    with st.chat_message("assistant"):
+        if not job.finished:
+            st.info(f"{active_job['loading_message']} ({job.elapsed:.0f}s)")
+            st.text(job.latest_progress or "Processing...")
+            # Only this session's job: other users' CAPTCHAs are in their own browser windows
+            for handoff in get_captcha_handoffs().pending(owner=job.job_id):
+                st.warning(f"Solve the CAPTCHA for {handoff.url} in the browser window, then continue.")
+                if st.button("✅ CAPTCHA solved", key=f"captcha_{handoff.handoff_id}"):
+                    get_captcha_handoffs().resolve(handoff.handoff_id, owner=job.job_id)
+            if st.button("✖️ Cancel", key=f"cancel_{job.job_id}"):
+                job_runner.cancel(job.job_id)
+            time.sleep(JOB_POLL_INTERVAL)
+            st.rerun()
+
+        del st.session_state.active_job
+        if job.status == DONE:
+            full_response = display_response(job.result)
+            st.text(f"Scraping completed in {job.elapsed:.2f} seconds.")
+        elif job.status == CANCELLED:
+            full_response = "Request cancelled."
+        else:
+            st.error(f"An error occurred during scraping: {job.error}")
+            full_response = f"An unexpected error occurred: {job.error}. Please try again or contact support if the issue persists."
+
+        chat = st.session_state.chat_history.get(active_job["chat_id"])
+        if chat is not None and full_response is not None:
+            if isinstance(full_response, tuple) and len(full_response) == 2 and isinstance(full_response[1], BytesIO):
+                message = {"role": "assistant", "content": full_response[0]}
+            else:
+                message = {"role": "assistant", "content": full_response}
+            trace = st.session_state.web_scraper_chat.last_trace if st.session_state.web_scraper_chat else None
+            if job.status == DONE and trace is not None:
+                message["timings"] = {"total_ms": round(trace.duration_ms, 1), "stages": trace.breakdown()}
+            chat["messages"].append(message)
+        save_chat_history(st.session_state.chat_history)
+        st.rerun()
+
+def display_timings(timings):
+    with st.expander(f"⏱️ Timing breakdown ({timings['total_ms'] / 1000:.2f}s)"):
+        st.dataframe(pd.DataFrame(timings["stages"]), hide_index=True)
+
 def get_date_group(date_str):
     date = datetime.strptime(date_str, "%Y-%m-%d")
     today = datetime.now().date()
@@ -184,10 +228,13 @@ def initialize_web_scraper_chat(url=None):
         wait_for='domcontentloaded'
     )
     
-    web_scraper_chat = StreamlitWebScraperChat(model_name=model, scraper_config=scraper_config)
+    web_scraper_chat = StreamlitWebScraperChat(model_name=model, scraper_config=scraper_config,
+                                               chat_id=st.session_state.current_chat_id)
+    # Only a cached page is restored: fetching here would block the script, and a -captcha fetch
+    # would wait on a button that cannot be drawn until it returns
     if url:
-        web_scraper_chat.process_message(url)
-        
+        web_scraper_chat.restore_cached(url)
+
         website_name = get_website_name(url)
         st.session_state.chat_history[st.session_state.current_chat_id]["name"] = website_name
     
@@ -204,6 +251,7 @@ def load_css():
     with open("app/styles.css", "r") as f:
         st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
 
+@st.cache_resource(show_spinner=False)
 def get_image_base64(image_path):
     with open(image_path, "rb") as image_file:
         return base64.b64encode(image_file.read()).decode()
@@ -227,54 +275,74 @@ def render_message(role, content, avatar_path):
     </div>
     """
 
+def get_message_hash(content) -> str:
+    if isinstance(content, BytesIO):
+        raw = content.getvalue()
+    elif isinstance(content, bytes):
+        raw = content
+    else:
+        raw = str(content).encode()
+    return hashlib.md5(raw).hexdigest()
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def build_message_artifacts(message_hash, _content):
+    """Parse a message into its table and download payload, memoized by content hash."""
+    data = extract_data_from_markdown(_content)
+    if data is None:
+        return None
+
+    is_excel = isinstance(data, BytesIO) or (isinstance(_content, str) and 'excel' in _content.lower())
+    df = format_data(data, 'excel' if is_excel else 'csv')
+    if df is None:
+        return {"df": None, "is_excel": is_excel, "download": None}
+
+    if is_excel:
+        excel_buffer = BytesIO()
+        with pd.ExcelWriter(excel_buffer, engine='xlsxwriter') as writer:
+            df.to_excel(writer, index=False, sheet_name='Sheet1')
+        download = excel_buffer.getvalue()
+    else:
+        download = df.to_csv(index=False).encode()
+
+    return {"df": df, "is_excel": is_excel, "download": download}
+
 def display_message_with_sheets_upload(message, message_index):
     content = message["content"]
     if isinstance(content, (str, bytes, BytesIO)):
-        data = extract_data_from_markdown(content)
-        if data is not None:
-            try:
-                is_excel = isinstance(data, BytesIO) or (isinstance(content, str) and 'excel' in content.lower())
-                if is_excel:
-                    df = format_data(data, 'excel')
-                else:
-                    df = format_data(data, 'csv')
-                
-                if df is not None:
-                    st.dataframe(df)
-                    
-                    if not is_excel:
-                        csv_buffer = BytesIO()
-                        df.to_csv(csv_buffer, index=False)
-                        csv_buffer.seek(0)
-                        st.download_button(
-                            label="📥 Download as CSV",
-                            data=csv_buffer,
-                            file_name="data.csv",
-                            mime="text/csv",
-                            key=f"csv_download_{message_index}"
-                        )
-                    else:
-                        excel_buffer = BytesIO()
-                        with pd.ExcelWriter(excel_buffer, engine='xlsxwriter') as writer:
-                            df.to_excel(writer, index=False, sheet_name='Sheet1')
-                        excel_buffer.seek(0)
-                        st.download_button(
-                            label="📥 Download as Excel",
-                            data=excel_buffer,
-                            file_name="data.xlsx",
-                            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                            key=f"excel_download_{message_index}"
-                        )
-                    
-                    display_google_sheets_button(df, f"sheets_upload_{message_index}")
-                else:
-                    st.warning("Failed to display data as a table. Showing raw content:")
-                    st.code(content)
-            except Exception as e:
-                st.error(f"Error processing data: {str(e)}")
-                st.code(content)
-        else:
+        try:
+            artifacts = build_message_artifacts(get_message_hash(content), content)
+        except Exception as e:
+            st.error(f"Error processing data: {str(e)}")
+            st.code(content)
+            return
+
+        if artifacts is None:
             st.markdown(content)
+        elif artifacts["df"] is None:
+            st.warning("Failed to display data as a table. Showing raw content:")
+            st.code(content)
+        else:
+            df = artifacts["df"]
+            st.dataframe(df)
+
+            if not artifacts["is_excel"]:
+                st.download_button(
+                    label="📥 Download as CSV",
+                    data=artifacts["download"],
+                    file_name="data.csv",
+                    mime="text/csv",
+                    key=f"csv_download_{message_index}"
+                )
+            else:
+                st.download_button(
+                    label="📥 Download as Excel",
+                    data=artifacts["download"],
+                    file_name="data.xlsx",
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                    key=f"excel_download_{message_index}"
+                )
+
+            display_google_sheets_button(df, f"sheets_upload_{message_index}")
     else:
         st.markdown(str(content))
 
@@ -340,6 +408,11 @@ def main():
         if not os.getenv("GOOGLE_API_KEY") and any(model.startswith("gemini-") for model in all_models):
             st.warning("Google API Key is not set. Gemini models may not be available.")
 
+        chat_usage = get_usage_ledger().summary(session_id=st.session_state.current_chat_id)
+        total_usage = get_usage_ledger().summary()
+        st.caption(f"🔢 Tokens this chat: {chat_usage['total_tokens']:,} (~${chat_usage['cost']:.4f}) · "
+                   f"all chats: {total_usage['total_tokens']:,} (~${total_usage['cost']:.4f})")
+
         st.session_state.use_current_browser = st.checkbox("Use Current Browser (No Docker)", value=False, help="Works Natively, Doesn't Work with Docker. if a website is blocking your browser, you can use this option to use the current browser instead of opening a new one.")
 
         if st.button("Refresh Ollama Models"):
@@ -379,8 +452,9 @@ def main():
                         st.session_state.current_chat_id = chat_id
                         messages = chat_data['messages']
                         last_url = get_last_url_from_chat(messages)
-                        if last_url and not st.session_state.web_scraper_chat:
-                            st.session_state.web_scraper_chat = initialize_web_scraper_chat(last_url)
+                        # The chat's page is restored only if it is still in the content cache; otherwise
+                        # the user re-sends the URL
+                        st.session_state.web_scraper_chat = initialize_web_scraper_chat(last_url) if last_url else None
                         st.rerun()
 
                 with col2:
@@ -420,16 +494,31 @@ def main():
 
     with chat_container:
         st.markdown('<div class="chat-container">', unsafe_allow_html=True)
-        for index, message in enumerate(st.session_state.chat_history[st.session_state.current_chat_id]["messages"]):
+        messages = st.session_state.chat_history[st.session_state.current_chat_id]["messages"]
+        if st.session_state.get('visible_chat_id') != st.session_state.current_chat_id:
+            st.session_state.visible_chat_id = st.session_state.current_chat_id
+            st.session_state.visible_message_count = MESSAGES_PER_PAGE
+        first_visible = max(0, len(messages) - st.session_state.visible_message_count)
+        if first_visible > 0:
+            if st.button(f"⬆️ Load earlier messages ({first_visible} hidden)", key="load_earlier_messages"):
+                st.session_state.visible_message_count += MESSAGES_PER_PAGE
+                st.rerun()
+        for index, message in enumerate(messages[first_visible:], start=first_visible):
             if message["role"] == "user":
                 st.markdown(render_message("user", message["content"], user_avatar_path), unsafe_allow_html=True)
             else:
                 with st.container():
                     st.markdown(render_message("assistant", "", ai_avatar_path), unsafe_allow_html=True)
                     display_message_with_sheets_upload(message, index)
+                    if message.get("timings"):
+                        display_timings(message["timings"])
         st.markdown('</div>', unsafe_allow_html=True)
 
-    prompt = st.chat_input("Enter the URL to scrape or ask a question regarding the data", key="user_input")
+    if st.session_state.get('active_job'):
+        display_active_job(st.session_state.active_job)
+
+    prompt = st.chat_input("Enter the URL to scrape or ask a question regarding the data", key="user_input",
+                           disabled=bool(st.session_state.get('active_job')))
 
     if prompt:
         st.session_state.chat_history[st.session_state.current_chat_id]["messages"].append({"role": "user", "content": prompt})
@@ -442,27 +531,17 @@ def main():
             st.session_state.chat_history[st.session_state.current_chat_id]["name"] = website_name
             st.info(f"Scraping {website_name}... This may take a moment.")
 
-        with st.chat_message("assistant"):
-            try:
-                full_response = loading_animation(
-                    safe_process_message,
-                    st.session_state.web_scraper_chat,
-                    prompt
-                )
-                if isinstance(full_response, str) and not full_response.startswith("Error:"):
-                    st.success("Scraping completed successfully!")
-
-                st.write("Debug: Full response type:", type(full_response))
-                if full_response is not None:
-                    if isinstance(full_response, tuple) and len(full_response) == 2 and isinstance(full_response[1], BytesIO):
-                        st.session_state.chat_history[st.session_state.current_chat_id]["messages"].append({"role": "assistant", "content": full_response[0]})
-                    else:
-                        st.session_state.chat_history[st.session_state.current_chat_id]["messages"].append({"role": "assistant", "content": full_response})
-                    save_chat_history(st.session_state.chat_history)
-            except Exception as e:
-                st.error(f"An unexpected error occurred: {str(e)}")
-            save_chat_history(st.session_state.chat_history)
-            st.rerun()
+        if prompt.strip():
+            st.session_state.active_job = {
+                "job_id": st.session_state.web_scraper_chat.submit_message(prompt),
+                "chat_id": st.session_state.current_chat_id,
+                "loading_message": get_loading_message()
+            }
+        else:
+            st.session_state.chat_history[st.session_state.current_chat_id]["messages"].append(
+                {"role": "assistant", "content": "I'm sorry, but I didn't receive any input. Could you please try again?"})
+        save_chat_history(st.session_state.chat_history)
+        st.rerun()
 
     st.markdown(
         """
@@ -0,0 +1,193 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple, Union
+
+from .model_registry import get_model_capabilities
+from .ollama_models import OllamaModel
+from .prompts import get_prompt_for_model
+from .utils.rate_limiter import DEFAULT_MAX_RETRIES, call_with_retry, get_rate_limiter
+from .utils.resource_pool import get_llm_client
+
+FALLBACK_STATUS_CODES = {408, 409, 429}
+
+def model_key(model_name: Union[str, OllamaModel]) -> str:
+    """Registry and rate-limiter name of a model, which may be given as an OllamaModel instance"""
+    return f"ollama:{model_name.model_name}" if isinstance(model_name, OllamaModel) else model_name
+
+async def invoke_model(client: Any, model_name: str, content: str, query: str) -> str:
+    """Send the extraction prompt for one chunk to a single model"""
+    prompt_template = get_prompt_for_model(model_key(model_name))
+    if isinstance(client, OllamaModel):
+        return await client.generate(prompt=prompt_template.format(webpage_content=content, query=query))
+    chain = prompt_template | client
+    response = await chain.ainvoke({"webpage_content": content, "query": query})
+    return response.content
+
+def get_status_code(error: BaseException) -> Optional[int]:
+    for candidate in (error, getattr(error, "response", None)):
+        for attr in ("status_code", "status", "code"):
+            value = getattr(candidate, attr, None)
+            if isinstance(value, int):
+                return value
+    return None
+
+def is_fallback_error(error: BaseException) -> bool:
+    """Rate limits, server errors, timeouts and dropped connections are worth retrying elsewhere"""
+    status = get_status_code(error)
+    if status is not None:
+        return status in FALLBACK_STATUS_CODES or status >= 500
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    name = type(error).__name__
+    return any(marker in name for marker in ("Timeout", "Connection", "RateLimit", "ServiceUnavailable"))
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    return get_status_code(error) == 429 or "RateLimit" in type(error).__name__ or "ResourceExhausted" in type(error).__name__
+
+async def invoke_with_retry(client: Any, model_name: str, content: str, query: str,
+                            estimated_tokens: int = 0, max_retries: int = DEFAULT_MAX_RETRIES) -> str:
+    """invoke_model under the process-wide rate limiter for this model, retrying transient failures"""
+    name = model_key(model_name)
+    # Ollama capabilities come from an HTTP lookup, which must not block the shared loop
+    capabilities = await asyncio.to_thread(get_model_capabilities, name)
+    limiter = get_rate_limiter(name, capabilities.requests_per_minute, capabilities.tokens_per_minute)
+    return await call_with_retry(lambda: invoke_model(client, model_name, content, query), limiter,
+                                 is_retryable=is_fallback_error, is_rate_limit=is_rate_limit_error,
+                                 estimated_tokens=estimated_tokens, max_retries=max_retries)
+
+@dataclass
+class ProviderHealth:
+    latency_ewma: Optional[float] = None
+    recent_latencies: Deque[float] = field(default_factory=lambda: deque(maxlen=50))
+    successes: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    unhealthy_until: float = 0.0
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.unhealthy_until
+
+    def p95(self) -> Optional[float]:
+        if len(self.recent_latencies) < 5:
+            return None
+        ordered = sorted(self.recent_latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+class LLMRouter:
+    """Routes extraction calls across models with health tracking, fallback and optional hedging"""
+
+    def __init__(self, model_names: List[str], model_kwargs: Optional[Dict[str, Any]] = None,
+                 hedge: bool = False, ewma_alpha: float = 0.3, failure_threshold: int = 3,
+                 cooldown: float = 30.0, default_hedge_delay: float = 10.0):
+        self.logger = logging.getLogger(__name__)
+        self.model_names = model_names
+        self.clients = {name: get_llm_client(name, model_kwargs) for name in model_names}
+        self.health = {name: ProviderHealth() for name in model_names}
+        self.hedge = hedge
+        self.ewma_alpha = ewma_alpha
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.default_hedge_delay = default_hedge_delay
+
+    def ordered_models(self) -> List[str]:
+        """Healthy models in priority order; models in cooldown are only tried when nothing else is left"""
+        healthy = [name for name in self.model_names if self.health[name].healthy]
+        return healthy + [name for name in self.model_names if name not in healthy]
+
+    def _record_success(self, name: str, latency: float):
+        health = self.health[name]
+        health.successes += 1
+        health.consecutive_failures = 0
+        health.unhealthy_until = 0.0
+        health.recent_latencies.append(latency)
+        if health.latency_ewma is None:
+            health.latency_ewma = latency
+        else:
+            health.latency_ewma = self.ewma_alpha * latency + (1 - self.ewma_alpha) * health.latency_ewma
+
+    def _record_failure(self, name: str, error: BaseException):
+        health = self.health[name]
+        health.failures += 1
+        health.consecutive_failures += 1
+        if is_rate_limit_error(error) or health.consecutive_failures >= self.failure_threshold:
+            health.unhealthy_until = time.monotonic() + self.cooldown
+            self.logger.warning(f"Marking {name} unhealthy for {self.cooldown:.0f}s after: {str(error)}")
+
+    async def _call(self, name: str, content: str, query: str, estimated_tokens: int = 0,
+                    max_retries: int = 0) -> Tuple[str, str]:
+        start = time.monotonic()
+        try:
+            result = await invoke_with_retry(self.clients[name], name, content, query, estimated_tokens, max_retries)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._record_failure(name, e)
+            raise
+        self._record_success(name, time.monotonic() - start)
+        return result, name
+
+    async def _hedged_call(self, primary: str, secondary: str, content: str, query: str,
+                           estimated_tokens: int = 0, tried: Optional[Set[str]] = None) -> Tuple[str, str]:
+        """Start the secondary model if the primary is slower than its own p95. Models that were
+        called are added to `tried`."""
+        tried = set() if tried is None else tried
+        hedge_delay = self.health[primary].p95() or self.default_hedge_delay
+        tried.add(primary)
+        primary_task = asyncio.ensure_future(self._call(primary, content, query, estimated_tokens))
+        done, _ = await asyncio.wait({primary_task}, timeout=hedge_delay)
+        if done:
+            return primary_task.result()
+
+        self.logger.info(f"{primary} exceeded {hedge_delay:.1f}s, hedging with {secondary}")
+        tried.add(secondary)
+        pending = {primary_task, asyncio.ensure_future(self._call(secondary, content, query, estimated_tokens))}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def generate(self, content: str, query: str, estimated_tokens: int = 0) -> Tuple[str, str]:
+        """Return (response, model name that produced it).
+
+        Earlier models fail over immediately; only the last one left retries with backoff. A model
+        a hedge already called is not called again.
+        """
+        models = self.ordered_models()
+        tried: Set[str] = set()
+        while True:
+            name, *remaining = [model for model in models if model not in tried]
+            try:
+                if self.hedge and remaining:
+                    return await self._hedged_call(name, remaining[0], content, query, estimated_tokens, tried)
+                return await self._call(name, content, query, estimated_tokens,
+                                        max_retries=0 if remaining else DEFAULT_MAX_RETRIES)
+            except Exception as e:
+                tried.add(name)
+                remaining = [model for model in models if model not in tried]
+                if not remaining or not is_fallback_error(e):
+                    raise
+                self.logger.warning(f"{name} failed ({str(e)}), falling back to {remaining[0]}")
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            name: {
+                "healthy": health.healthy,
+                "latency_ewma": health.latency_ewma,
+                "p95": health.p95(),
+                "successes": health.successes,
+                "failures": health.failures,
+            }
+            for name, health in self.health.items()
+        }
@@ -0,0 +1,62 @@
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional, Tuple
+
+@dataclass(frozen=True)
+class ModelCapabilities:
+    """What a model can handle, used for client construction, chunk sizing and rate control"""
+    provider: str
+    context_window: int
+    max_output_tokens: int
+    tokenizer: str
+    requests_per_minute: Optional[int] = None
+    tokens_per_minute: Optional[int] = None
+    supports_streaming: bool = True
+    supports_json_mode: bool = False
+
+MODEL_CAPABILITIES: Dict[str, ModelCapabilities] = {
+    "gpt-4o-mini": ModelCapabilities("openai", 128000, 16384, "o200k_base", 500, 200000, True, True),
+    "gpt-4": ModelCapabilities("openai", 8192, 8192, "cl100k_base", 500, 10000, True, False),
+    "gpt-3.5-turbo": ModelCapabilities("openai", 16385, 4096, "cl100k_base", 3500, 200000, True, True),
+    "gemini-1.5-flash": ModelCapabilities("gemini", 1048576, 8192, "approx", 15, 1000000, True, True),
+    "gemini-pro": ModelCapabilities("gemini", 32760, 8192, "approx", 60, None, True, False),
+}
+
+# Fallbacks for model names that are not listed exactly, checked in order
+PREFIX_CAPABILITIES: List[Tuple[str, ModelCapabilities]] = [
+    ("gpt-4o", ModelCapabilities("openai", 128000, 16384, "o200k_base", 500, 200000, True, True)),
+    ("gpt-4", ModelCapabilities("openai", 128000, 4096, "cl100k_base", 500, 30000, True, True)),
+    ("gpt-3.5", ModelCapabilities("openai", 16385, 4096, "cl100k_base", 3500, 200000, True, True)),
+    ("text-", ModelCapabilities("openai-completion", 4097, 1024, "p50k_base", 3000, 250000, True, False)),
+    ("gemini-1.5", ModelCapabilities("gemini", 1048576, 8192, "approx", 15, 1000000, True, True)),
+    ("gemini-", ModelCapabilities("gemini", 32760, 8192, "approx", 60, None, True, False)),
+]
+
+OLLAMA_DEFAULT_CAPABILITIES = ModelCapabilities("ollama", 8192, 2048, "approx", None, None, True, True)
+
+# Room left for the prompt template and query when sizing content chunks
+PROMPT_OVERHEAD_TOKENS = 1000
+MIN_CHUNK_TOKENS = 1000
+
+def register_model(model_name: str, capabilities: ModelCapabilities):
+    MODEL_CAPABILITIES[model_name] = capabilities
+
+def get_model_capabilities(model_name: str) -> ModelCapabilities:
+    """Registered capabilities, or for Ollama models what the server reports (a blocking request)"""
+    if model_name in MODEL_CAPABILITIES:
+        return MODEL_CAPABILITIES[model_name]
+    if model_name.startswith("ollama:"):
+        from .ollama_models import OllamaModelManager
+        return OllamaModelManager.get_capabilities(model_name[7:])
+    for prefix, capabilities in PREFIX_CAPABILITIES:
+        if model_name.startswith(prefix):
+            return capabilities
+    raise ValueError(f"Unsupported model: {model_name}")
+
+def get_chunk_size(capabilities: ModelCapabilities) -> int:
+    """Largest content chunk that leaves room for the prompt and the model's answer"""
+    output_reserve = min(capabilities.max_output_tokens, capabilities.context_window // 4)
+    return max(MIN_CHUNK_TOKENS, capabilities.context_window - output_reserve - PROMPT_OVERHEAD_TOKENS)
+
+def with_context_window(capabilities: ModelCapabilities, context_window: int) -> ModelCapabilities:
+    return replace(capabilities, context_window=context_window,
+                   max_output_tokens=min(capabilities.max_output_tokens, context_window // 4))
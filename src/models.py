@@ -4,15 +4,17 @@ from langchain.base_language import BaseLanguageModel
 import google.generativeai as genai
 import os
 from langchain_google_genai import ChatGoogleGenerativeAI
+from .model_registry import get_model_capabilities
 
 class Models:
     @staticmethod
     def get_model(model_name: str, **kwargs) -> BaseLanguageModel:
-        if model_name in ["gpt-4o-mini", "gpt-4", "gpt-3.5-turbo"]:
+        provider = get_model_capabilities(model_name).provider
+        if provider == "openai":
             return ChatOpenAI(model_name=model_name, **kwargs)
-        elif model_name.startswith("text-"):
+        elif provider == "openai-completion":
             return OpenAI(model_name=model_name, **kwargs)
-        elif model_name.startswith("gemini-"):
+        elif provider == "gemini":
             return ChatGoogleGenerativeAI(model=model_name, **kwargs)
         else:
             raise ValueError(f"Unsupported model: {model_name}")
\ No newline at end of file
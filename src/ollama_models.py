@@ -1,14 +1,36 @@
 import requests
-from typing import List, Dict, Any
+import asyncio
+from typing import List, Dict, Any, Optional, Tuple
+import logging
 import os
 import json
+import threading
+import time
+from .model_registry import ModelCapabilities, OLLAMA_DEFAULT_CAPABILITIES, with_context_window
+
+logger = logging.getLogger(__name__)
+
+# Failed lookups are remembered briefly so every call doesn't wait on an unreachable server, and
+# are retried after that so a model picks up its real context window once Ollama is reachable
+FAILED_LOOKUP_TTL = 60.0
+_capabilities: Dict[str, Tuple[ModelCapabilities, float]] = {}
+_capabilities_lock = threading.Lock()
 
 class OllamaModel:
-    def __init__(self, model_name: str):
+    """Ollama client; without an explicit num_ctx the model's context window is looked up on the
+    first request rather than when the client is created"""
+
+    def __init__(self, model_name: str, num_ctx: Optional[int] = None):
         self.model_name = model_name
         self.base_url = os.getenv('OLLAMA_BASE_URL', 'http://localhost:11434')
+        self.num_ctx = num_ctx
 
     async def generate(self, prompt: str, system_prompt: str = "") -> str:
+        # requests blocks, so run it off the event loop to keep concurrent fetches and hedged calls moving
+        return await asyncio.to_thread(self._generate, prompt, system_prompt)
+
+    def _generate(self, prompt: str, system_prompt: str = "") -> str:
+        num_ctx = self.num_ctx or OllamaModelManager.get_capabilities(self.model_name).context_window
         try:
             response = requests.post(
                 f"{self.base_url}/api/generate",
@@ -16,7 +38,8 @@ class OllamaModel:
                     "model": self.model_name,
                     "prompt": prompt,
                     "system": system_prompt,
-                    "stream": False
+                    "stream": False,
+                    "options": {"num_ctx": num_ctx}
                 },
                 stream=True
             )
@@ -41,7 +64,7 @@ class OllamaModel:
     async def list_models() -> List[str]:
         base_url = os.getenv('OLLAMA_BASE_URL', 'http://localhost:11434')
         try:
-            response = requests.get(f"{base_url}/api/tags")
+            response = await asyncio.to_thread(requests.get, f"{base_url}/api/tags")
             response.raise_for_status()
             models = response.json()
             return [model['name'] for model in models['models']]
@@ -51,4 +74,29 @@ class OllamaModel:
 class OllamaModelManager:
     @staticmethod
     def get_model(model_name: str) -> OllamaModel:
-        return OllamaModel(model_name)
\ No newline at end of file
+        return OllamaModel(model_name)
+
+    @staticmethod
+    def get_capabilities(model_name: str) -> ModelCapabilities:
+        """Context window from `ollama show`, capped by OLLAMA_NUM_CTX since Ollama allocates all of it"""
+        with _capabilities_lock:
+            cached = _capabilities.get(model_name)
+            if cached and time.monotonic() < cached[1]:
+                return cached[0]
+        max_ctx = int(os.getenv('OLLAMA_NUM_CTX', str(OLLAMA_DEFAULT_CAPABILITIES.context_window)))
+        base_url = os.getenv('OLLAMA_BASE_URL', 'http://localhost:11434')
+        try:
+            response = requests.post(f"{base_url}/api/show", json={"model": model_name}, timeout=5)
+            response.raise_for_status()
+            model_info = response.json().get('model_info', {})
+            context_length = next((v for k, v in model_info.items() if k.endswith('.context_length')), None)
+        except Exception as e:
+            logger.warning(f"Could not read context length for {model_name}: {str(e)}")
+            capabilities = with_context_window(OLLAMA_DEFAULT_CAPABILITIES, max_ctx)
+            expires_at = time.monotonic() + FAILED_LOOKUP_TTL
+        else:
+            capabilities = with_context_window(OLLAMA_DEFAULT_CAPABILITIES, min(context_length or max_ctx, max_ctx))
+            expires_at = float("inf")
+        with _capabilities_lock:
+            _capabilities[model_name] = (capabilities, expires_at)
+        return capabilities
@@ -0,0 +1,68 @@
+import asyncio
+import contextvars
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+# Job (or session) on whose behalf the current task scrapes; set by whoever runs the job so its
+# handoffs are only shown to, and resolved by, the user who started it
+handoff_owner: contextvars.ContextVar = contextvars.ContextVar("cyberscraper_handoff_owner", default=None)
+
+@dataclass
+class CaptchaHandoff:
+    """A scrape parked until a human solves the CAPTCHA in the browser window"""
+    handoff_id: str
+    url: str
+    loop: asyncio.AbstractEventLoop
+    event: asyncio.Event
+    owner: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+
+    @property
+    def waiting_for(self) -> float:
+        return time.time() - self.created_at
+
+class CaptchaHandoffRegistry:
+    """Pending CAPTCHA handoffs, resolvable from any thread (e.g. a Streamlit button or an API call)"""
+
+    def __init__(self):
+        self._pending: Dict[str, CaptchaHandoff] = {}
+        self._lock = threading.Lock()
+
+    async def wait(self, url: str, timeout: Optional[float] = None, owner: Optional[str] = None) -> bool:
+        """Park the calling coroutine until resolve() is called; returns False on timeout. The owner
+        defaults to the handoff_owner of the calling task."""
+        handoff = CaptchaHandoff(uuid.uuid4().hex[:8], url, asyncio.get_running_loop(), asyncio.Event(),
+                                 owner if owner is not None else handoff_owner.get())
+        with self._lock:
+            self._pending[handoff.handoff_id] = handoff
+        try:
+            await asyncio.wait_for(handoff.event.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._lock:
+                self._pending.pop(handoff.handoff_id, None)
+
+    def pending(self, owner: Optional[str] = None) -> List[CaptchaHandoff]:
+        """Handoffs waiting on the given owner, or all of them when no owner is given"""
+        with self._lock:
+            handoffs = [handoff for handoff in self._pending.values() if owner is None or handoff.owner == owner]
+        return sorted(handoffs, key=lambda handoff: handoff.created_at)
+
+    def resolve(self, handoff_id: str, owner: Optional[str] = None) -> bool:
+        """Wake the parked scrape; with an owner, only if the handoff belongs to it"""
+        with self._lock:
+            handoff = self._pending.get(handoff_id)
+        if handoff is None or (owner is not None and handoff.owner != owner):
+            return False
+        handoff.loop.call_soon_threadsafe(handoff.event.set)
+        return True
+
+_registry = CaptchaHandoffRegistry()
+
+def get_captcha_handoffs() -> CaptchaHandoffRegistry:
+    return _registry
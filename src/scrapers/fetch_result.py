@@ -0,0 +1,83 @@
+import re
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import List, Optional
+
+class FetchErrorType(Enum):
+    TIMEOUT = "timeout"
+    DNS = "dns"
+    CONNECTION = "connection"
+    HTTP_STATUS = "http_status"
+    BOT_WALL = "bot_wall"
+    UNKNOWN = "unknown"
+
+RETRYABLE_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+# Markers specific to interstitial challenge pages, matched anywhere near the top of the HTML
+BOT_WALL_MARKERS = (
+    "cf-browser-verification",
+    "challenge-running",
+    "cf_chl_opt",
+    "px-captcha",
+)
+# Generic phrases that real pages can contain too, so they only count in the <title>
+BOT_WALL_TITLES = (
+    "just a moment...",
+    "attention required! | cloudflare",
+    "checking your browser before accessing",
+    "are you a robot",
+)
+TITLE_PATTERN = re.compile(r"<title[^>]*>(.*?)</title>", re.S | re.I)
+
+@dataclass
+class CapturedResponse:
+    """A JSON body the page fetched for itself while loading"""
+    url: str
+    body: str
+
+@dataclass
+class FetchResult:
+    """Outcome of fetching one page; failed pages carry an error type instead of content"""
+    url: str
+    content: Optional[str] = None
+    status: Optional[int] = None
+    error_type: Optional[FetchErrorType] = None
+    error: Optional[str] = None
+    attempts: int = 1
+    json_responses: List[CapturedResponse] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return self.error_type is None and self.content is not None
+
+    @property
+    def retryable(self) -> bool:
+        if self.error_type in (FetchErrorType.TIMEOUT, FetchErrorType.CONNECTION, FetchErrorType.BOT_WALL):
+            return True
+        return self.error_type == FetchErrorType.HTTP_STATUS and self.status in RETRYABLE_STATUSES
+
+    def describe(self) -> str:
+        if self.ok:
+            return f"{self.url}: ok"
+        status = f" {self.status}" if self.status else ""
+        return f"{self.url}: {self.error_type.value}{status} after {self.attempts} attempt(s) ({self.error})"
+
+def classify_exception(error: BaseException) -> FetchErrorType:
+    message = str(error)
+    if "ERR_NAME_NOT_RESOLVED" in message or "NameResolution" in message or "getaddrinfo" in message:
+        return FetchErrorType.DNS
+    if "Timeout" in type(error).__name__ or "Timeout" in message or "ERR_TIMED_OUT" in message:
+        return FetchErrorType.TIMEOUT
+    if any(marker in message for marker in ("ERR_CONNECTION", "ERR_NETWORK", "ERR_INTERNET_DISCONNECTED",
+                                            "ERR_EMPTY_RESPONSE", "ERR_PROXY", "ECONNRESET", "ECONNREFUSED")):
+        return FetchErrorType.CONNECTION
+    if isinstance(error, ConnectionError):
+        return FetchErrorType.CONNECTION
+    return FetchErrorType.UNKNOWN
+
+def is_bot_wall(content: str) -> bool:
+    head = content[:20000].lower()
+    if any(marker in head for marker in BOT_WALL_MARKERS):
+        return True
+    title = TITLE_PATTERN.search(head)
+    return bool(title) and any(phrase in " ".join(title.group(1).split()) for phrase in BOT_WALL_TITLES)
@@ -3,6 +3,8 @@ import json
 from .base_scraper import BaseScraper
 from typing import Dict, Any
 
+INVALID_JSON = {"error": "Invalid JSON content"}
+
 class JSONScraper(BaseScraper):
     async def fetch_content(self, url: str, proxy: str = None) -> str:
         raise NotImplementedError("JSON content is fetched by PlaywrightScraper")
@@ -11,4 +13,4 @@ class JSONScraper(BaseScraper):
         try:
             return json.loads(content)
         except json.JSONDecodeError:
-            return {"error": "Invalid JSON content"}
+            return dict(INVALID_JSON)
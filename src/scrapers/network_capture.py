@@ -0,0 +1,56 @@
+import asyncio
+import logging
+from typing import List, Optional
+
+from playwright.async_api import Page, Response
+
+from .fetch_result import CapturedResponse
+
+MAX_CAPTURED_RESPONSES = 30
+MAX_RESPONSE_BYTES = 2_000_000
+
+class NetworkCapture:
+    """Records JSON bodies of XHR/fetch responses a page makes while it loads"""
+
+    def __init__(self, max_responses: int = MAX_CAPTURED_RESPONSES, max_bytes: int = MAX_RESPONSE_BYTES):
+        self.max_responses = max_responses
+        self.max_bytes = max_bytes
+        self.logger = logging.getLogger(__name__)
+        self._page: Optional[Page] = None
+        self._reads: List[asyncio.Future] = []
+
+    def attach(self, page: Page):
+        self._page = page
+        page.on("response", self._on_response)
+
+    def detach(self):
+        if self._page is not None:
+            self._page.remove_listener("response", self._on_response)
+            self._page = None
+
+    def _on_response(self, response: Response):
+        if len(self._reads) >= self.max_responses or response.status != 200:
+            return
+        if response.request.resource_type not in ("xhr", "fetch"):
+            return
+        headers = response.headers
+        if "json" not in headers.get("content-type", ""):
+            return
+        if int(headers.get("content-length") or 0) > self.max_bytes:
+            return
+        # Bodies must be read before the page navigates away, so start reading right away
+        self._reads.append(asyncio.ensure_future(self._read(response)))
+
+    async def _read(self, response: Response) -> Optional[CapturedResponse]:
+        try:
+            body = await response.text()
+        except Exception as e:
+            self.logger.debug(f"Could not read {response.url}: {str(e)}")
+            return None
+        return CapturedResponse(response.url, body) if len(body) <= self.max_bytes else None
+
+    async def collect(self) -> List[CapturedResponse]:
+        self.detach()
+        captured = await asyncio.gather(*self._reads, return_exceptions=True)
+        self._reads = []
+        return [item for item in captured if isinstance(item, CapturedResponse)]
@@ -0,0 +1,151 @@
+import hashlib
+import re
+from typing import Any, Optional, Set
+from urllib.parse import parse_qs, urlencode, urljoin, urlparse, urlunparse
+
+from bs4 import BeautifulSoup
+
+AUTO_PAGES = "auto"
+DEFAULT_MAX_AUTO_PAGES = 20
+
+NEXT_TEXT_PATTERN = re.compile(r"^\s*(next(\s+page)?|older(\s+posts)?|more results|›|»|→|>|>>)\s*$", re.I)
+NEXT_ATTR_PATTERN = re.compile(r"(^|[\s_-])next([\s_-]|$)", re.I)
+
+# Clickable "next" controls for JS pagination that has no href to follow
+NEXT_BUTTON_SELECTORS = [
+    "[rel='next']:not([disabled])",
+    "[aria-label*='next' i]:not([disabled]):not([aria-disabled='true'])",
+    "button:has-text('Next'):not([disabled])",
+    "a:has-text('Next')",
+    "button:has-text('Load more'):not([disabled])",
+    "button:has-text('Show more'):not([disabled])",
+    ".pagination-next:not(.disabled) a, .pagination-next:not(.disabled)",
+]
+
+PAGE_PARAMS = ("page", "p", "pg", "page_number", "pageNumber", "pageIndex")
+OFFSET_PARAMS = ("offset", "start", "skip", "from")
+LIMIT_PARAMS = ("limit", "per_page", "perPage", "page_size", "pageSize", "size", "count", "rows")
+CURSOR_PARAMS = ("cursor", "after", "page_token", "pageToken", "next_token", "continuation")
+NEXT_URL_KEYS = ("next", "next_url", "nextUrl", "next_page_url", "nextPageUrl", "next_link", "nextLink")
+NEXT_CURSOR_KEYS = ("next_cursor", "nextCursor", "endCursor", "end_cursor", "cursor", "after",
+                    "next_page_token", "nextPageToken", "continuation")
+HAS_MORE_KEYS = ("has_more", "hasMore", "hasNextPage", "has_next", "hasNext", "more")
+
+def parse_page_limit(pages: str, default: int = DEFAULT_MAX_AUTO_PAGES) -> int:
+    """Page cap for 'auto' or 'auto:N' page specs"""
+    _, _, limit = pages.partition(":")
+    return int(limit) if limit.strip().isdigit() else default
+
+def is_auto_pages(pages: Optional[str]) -> bool:
+    return bool(pages) and pages.lower().startswith(AUTO_PAGES)
+
+def content_fingerprint(content: str) -> str:
+    """Hash of a page's visible text, so the same listing served under a new URL is recognised"""
+    text = re.sub(r"<(script|style|noscript)\b.*?</\1>", " ", content, flags=re.S | re.I)
+    text = re.sub(r"<[^>]+>", " ", text)
+    return hashlib.md5(" ".join(text.split()).encode()).hexdigest()
+
+class PaginationTracker:
+    """Remembers visited URLs and content fingerprints so pagination stops instead of looping"""
+
+    def __init__(self):
+        self.seen_urls: Set[str] = set()
+        self.seen_fingerprints: Set[str] = set()
+
+    def visit(self, url: str) -> bool:
+        """Mark a URL as visited; False if it was already seen"""
+        key = url.split("#")[0].rstrip("/")
+        if key in self.seen_urls:
+            return False
+        self.seen_urls.add(key)
+        return True
+
+    def is_duplicate(self, content: str) -> bool:
+        fingerprint = content_fingerprint(content)
+        if fingerprint in self.seen_fingerprints:
+            return True
+        self.seen_fingerprints.add(fingerprint)
+        return False
+
+def find_next_url(html: str, current_url: str) -> Optional[str]:
+    """Next-page URL from rel=next links, or anchors whose text, label or class says "next" """
+    soup = BeautifulSoup(html, "html.parser")
+    candidates = soup.select("link[rel~=next], a[rel~=next]")
+    for anchor in soup.find_all("a", href=True):
+        label = " ".join(filter(None, [anchor.get_text(" ", strip=True), anchor.get("aria-label"),
+                                       anchor.get("title")]))
+        classes = " ".join(anchor.get("class", []) + [anchor.get("id") or ""])
+        if NEXT_TEXT_PATTERN.match(label) or (label and NEXT_TEXT_PATTERN.match(label.split()[0]) and len(label) < 20) \
+                or NEXT_ATTR_PATTERN.search(classes):
+            candidates.append(anchor)
+
+    for candidate in candidates:
+        href = (candidate.get("href") or "").strip()
+        if not href or href.startswith(("#", "javascript:")):
+            continue
+        next_url = urljoin(current_url, href)
+        if next_url.split("#")[0] != current_url.split("#")[0]:
+            return next_url
+    return None
+
+def is_paginated_endpoint(url: str) -> bool:
+    query = parse_qs(urlparse(url).query)
+    return any(param in query for param in PAGE_PARAMS + OFFSET_PARAMS + CURSOR_PARAMS)
+
+def _find_key(payload: Any, keys, depth: int = 2) -> Any:
+    if not isinstance(payload, dict) or depth < 0:
+        return None
+    for key in keys:
+        if payload.get(key) not in (None, ""):
+            return payload[key]
+    for value in payload.values():
+        found = _find_key(value, keys, depth - 1)
+        if found is not None:
+            return found
+    return None
+
+def _first_list_length(payload: Any) -> int:
+    if isinstance(payload, list):
+        return len(payload)
+    if isinstance(payload, dict):
+        for value in payload.values():
+            if isinstance(value, list):
+                return len(value)
+    return 0
+
+def next_endpoint_url(url: str, payload: Any) -> Optional[str]:
+    """URL of the next page of an XHR listing endpoint, from the payload's next link or cursor,
+    or by advancing its page/offset parameter"""
+    has_more = _find_key(payload, HAS_MORE_KEYS)
+    if has_more is False:
+        return None
+
+    next_link = _find_key(payload, NEXT_URL_KEYS)
+    if isinstance(next_link, str) and (next_link.startswith(("http", "/", "?"))):
+        return urljoin(url, next_link)
+
+    parsed = urlparse(url)
+    query = parse_qs(parsed.query, keep_blank_values=True)
+
+    def with_param(param: str, value: Any) -> str:
+        query[param] = [str(value)]
+        return urlunparse(parsed._replace(query=urlencode(query, doseq=True)))
+
+    cursor = _find_key(payload, NEXT_CURSOR_KEYS)
+    if isinstance(cursor, (str, int)) and not isinstance(cursor, bool):
+        param = next((p for p in CURSOR_PARAMS if p in query), "cursor")
+        if query.get(param) != [str(cursor)]:
+            return with_param(param, cursor)
+        return None
+
+    item_count = _first_list_length(payload)
+    if item_count == 0:
+        return None
+    for param in PAGE_PARAMS:
+        if param in query and query[param][0].isdigit():
+            return with_param(param, int(query[param][0]) + 1)
+    for param in OFFSET_PARAMS:
+        if param in query and query[param][0].isdigit():
+            limit = next((int(query[p][0]) for p in LIMIT_PARAMS if p in query and query[p][0].isdigit()), item_count)
+            return with_param(param, int(query[param][0]) + limit)
+    return None
@@ -1,7 +1,17 @@
 from playwright.async_api import async_playwright, Browser, BrowserContext, Page
 from .base_scraper import BaseScraper
-from typing import Dict, Any, Optional, List, Tuple
+from .captcha_handoff import get_captcha_handoffs
+from .fetch_result import FetchErrorType, FetchResult, classify_exception, is_bot_wall
+from .network_capture import NetworkCapture
+from .pagination import (NEXT_BUTTON_SELECTORS, PaginationTracker, find_next_url, is_auto_pages,
+                         is_paginated_endpoint, next_endpoint_url, parse_page_limit)
+from .scroll_harvest import harvest_scroll
+from .session_store import get_session_store
+from ..utils.proxy_manager import playwright_proxy
+from ..utils.tracing import get_tracer
+from typing import Dict, Any, Awaitable, Callable, Optional, List, Tuple
 import asyncio
+import json
 import random
 import logging
 import re
@@ -12,6 +22,9 @@ import time
 import os
 import tempfile
 
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 20.0
+
 class ScraperConfig:
     def __init__(self,
                  use_stealth: bool = True,
@@ -25,7 +38,14 @@ class ScraperConfig:
                  wait_for: str = 'domcontentloaded',
                  use_current_browser: bool = False,
                  max_retries: int = 3,
-                 delay_after_load: int = 2):
+                 delay_after_load: int = 2,
+                 challenge_timeout: int = 30,
+                 captcha_timeout: int = 300,
+                 max_pages: int = 20,
+                 scroll_harvest: bool = False,
+                 scroll_max_seconds: int = 60,
+                 scroll_max_items: int = 2000,
+                 capture_json: bool = True):
         self.use_stealth = use_stealth
         self.simulate_human = simulate_human
         self.use_custom_headers = use_custom_headers
@@ -38,6 +58,13 @@ class ScraperConfig:
         self.use_current_browser = use_current_browser
         self.max_retries = max_retries
         self.delay_after_load = delay_after_load
+        self.challenge_timeout = challenge_timeout
+        self.captcha_timeout = captcha_timeout
+        self.max_pages = max_pages
+        self.scroll_harvest = scroll_harvest
+        self.scroll_max_seconds = scroll_max_seconds
+        self.scroll_max_items = scroll_max_items
+        self.capture_json = capture_json
 
 class PlaywrightScraper(BaseScraper):
     def __init__(self, config: ScraperConfig = ScraperConfig()):
@@ -46,29 +73,36 @@ class PlaywrightScraper(BaseScraper):
         self.config = config
         self.chrome_process = None
         self.temp_user_data_dir = None
+        self.session_store = get_session_store()
 
-    async def fetch_content(self, url: str, proxy: Optional[str] = None, pages: Optional[str] = None, url_pattern: Optional[str] = None, handle_captcha: bool = False) -> List[str]:
+    async def fetch_content(self, url: str, proxy: Optional[str] = None, pages: Optional[str] = None, url_pattern: Optional[str] = None, handle_captcha: bool = False, scroll: bool = False) -> List[FetchResult]:
+        tracer = get_tracer()
+        scroll = scroll or self.config.scroll_harvest
         async with async_playwright() as p:
-            if self.config.use_current_browser:
-                browser = await self.launch_and_connect_to_chrome(p)
-            else:
-                browser = await self.launch_browser(p, proxy, handle_captcha)
+            with tracer.span("browser_launch", current_browser=self.config.use_current_browser):
+                if self.config.use_current_browser:
+                    browser = await self.launch_and_connect_to_chrome(p)
+                else:
+                    browser = await self.launch_browser(p, proxy, handle_captcha)
 
             try:
-                context = await self.create_context(browser, proxy)
-                page = await context.new_page()
+                with tracer.span("context_setup"):
+                    context = await self.create_context(browser, proxy, url)
+                    page = await context.new_page()
 
-                if self.config.use_stealth:
-                    await self.apply_stealth_settings(page)
-                await self.set_browser_features(page)
+                    if self.config.use_stealth:
+                        await self.apply_stealth_settings(page)
+                    await self.set_browser_features(page)
 
                 if handle_captcha:
                     await self.handle_captcha(page, url)
                 
-                contents = await self.scrape_multiple_pages(page, url, pages, url_pattern)
+                contents = await self.scrape_multiple_pages(page, url, pages, url_pattern, scroll)
+                if any(result.ok for result in contents):
+                    self.session_store.save_state(url, await context.storage_state())
             except Exception as e:
                 self.logger.error(f"Error during scraping: {str(e)}")
-                contents = [f"Error: {str(e)}"]
+                contents = [FetchResult(url, error_type=classify_exception(e), error=str(e))]
             finally:
                 if not self.config.use_current_browser:
                     await browser.close()
@@ -77,14 +111,18 @@ class PlaywrightScraper(BaseScraper):
         return contents
 
     async def handle_captcha(self, page: Page, url: str):
-        self.logger.info("Waiting for user to solve CAPTCHA...")
         await page.goto(url, wait_until=self.config.wait_for, timeout=self.config.timeout)
-        
-        print("Please solve the CAPTCHA in the browser window.")
-        print("Once solved, press Enter in this console to continue...")
-        input()
+        if self.session_store.load_state(url) and not is_bot_wall(await page.content()):
+            self.logger.info("Saved session is still valid, skipping CAPTCHA step.")
+            return
+
+        self.logger.info("Waiting for user to solve CAPTCHA in the browser window...")
+        if not await get_captcha_handoffs().wait(url, timeout=self.config.captcha_timeout):
+            self.logger.warning(f"CAPTCHA was not solved within {self.config.captcha_timeout}s, continuing anyway")
+            return
         
         await page.wait_for_load_state('networkidle')
+        self.session_store.save_state(url, await page.context.storage_state())
         self.logger.info("CAPTCHA handling completed.")
 
     async def launch_and_connect_to_chrome(self, playwright):
@@ -160,14 +198,16 @@ class PlaywrightScraper(BaseScraper):
             args=['--no-sandbox', '--disable-setuid-sandbox', '--disable-infobars',
                   '--window-position=0,0', '--ignore-certifcate-errors',
                   '--ignore-certifcate-errors-spki-list'],
-            proxy={'server': proxy} if proxy else None
+            proxy=playwright_proxy(proxy)
         )
 
-    async def create_context(self, browser: Browser, proxy: Optional[str] = None) -> BrowserContext:
+    async def create_context(self, browser: Browser, proxy: Optional[str] = None, url: Optional[str] = None) -> BrowserContext:
+        """New context for the URL's host, starting from its saved storage_state if one is still valid"""
         return await browser.new_context(
+            storage_state=self.session_store.load_state(url) if url else None,
             viewport={'width': 1920, 'height': 1080},
             user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            proxy={'server': proxy} if proxy else None,
+            proxy=playwright_proxy(proxy),
             java_script_enabled=True,
             ignore_https_errors=True
         )
@@ -209,8 +249,9 @@ class PlaywrightScraper(BaseScraper):
                 'Upgrade-Insecure-Requests': '1'
             })
 
-    async def scrape_multiple_pages(self, page: Page, base_url: str, pages: Optional[str] = None, url_pattern: Optional[str] = None) -> List[str]:
-        contents = []
+    async def scrape_multiple_pages(self, page: Page, base_url: str, pages: Optional[str] = None, url_pattern: Optional[str] = None, scroll: bool = False) -> List[FetchResult]:
+        if is_auto_pages(pages):
+            return await self.scrape_auto_pages(page, base_url, parse_page_limit(pages, self.config.max_pages), scroll)
 
         if not url_pattern:
             url_pattern = self.detect_url_pattern(base_url)
@@ -218,54 +259,303 @@ class PlaywrightScraper(BaseScraper):
         if not url_pattern and not pages:
             # Single page scraping
             self.logger.info(f"Scraping single page: {base_url}")
-            content = await self.navigate_and_get_content(page, base_url)
-            contents.append(content)
-        else:
-            # Multiple page scraping
-            page_numbers = self.parse_page_numbers(pages) if pages else [1]
-            for page_num in page_numbers:
-                current_url = self.apply_url_pattern(base_url, url_pattern, page_num) if url_pattern else base_url
-                self.logger.info(f"Scraping page {page_num}: {current_url}")
-
-                content = await self.navigate_and_get_content(page, current_url)
-                contents.append(content)
-
-                if page_num < len(page_numbers):
-                    await asyncio.sleep(random.uniform(1, 2))
-
-        return contents
-
-    async def navigate_and_get_content(self, page: Page, url: str) -> str:
+            return [await self.navigate_and_get_content(page, base_url, scroll=scroll)]
+
+        # Multiple page scraping
+        page_numbers = self.parse_page_numbers(pages) if pages else [1]
+        urls = [self.apply_url_pattern(base_url, url_pattern, page_num) if url_pattern else base_url
+                for page_num in page_numbers]
+        return await self.fetch_page_sequence(page, urls, scroll)
+
+    async def fetch_page_sequence(self, page: Page, urls: List[str], scroll: bool = False) -> List[FetchResult]:
+        """Fetch known page URLs in order. The next page starts loading in a second tab as soon as
+        the current one has navigated, and the sequence stops at a missing page following a loaded
+        one or at repeated content."""
+        tabs = [page] if len(urls) == 1 else [page, await page.context.new_page()]
+        tracker = PaginationTracker()
+        tasks: Dict[int, asyncio.Future] = {}
+
+        def start(i: int):
+            if i < len(urls) and i not in tasks:
+                self.logger.info(f"Scraping page {i + 1}: {urls[i]}")
+
+                async def prefetch_next(_: Page):
+                    start(i + 1)
+                tasks[i] = asyncio.ensure_future(self._fetch_in_tab(
+                    tabs[i % len(tabs)], urls[i], tasks.get(i - len(tabs)), prefetch_next, scroll))
+
+        results = []
+        try:
+            for i in range(len(urls)):
+                start(i)
+                result = await tasks[i]
+                # A missing page after a loaded one is the end of the range; before any has loaded it
+                # is a failure, kept so the caller can report why nothing came back
+                if not result.ok and result.status in (404, 410) and any(earlier.ok for earlier in results):
+                    self.logger.info(f"Page {i + 1} does not exist, stopping")
+                    break
+                if result.ok and tracker.is_duplicate(result.content):
+                    self.logger.info(f"Page {i + 1} repeats earlier content, stopping")
+                    break
+                results.append(result)
+        finally:
+            await self._cancel_pending(tasks)
+            await self._close_extra_tabs(tabs)
+        return results
+
+    async def scrape_auto_pages(self, page: Page, base_url: str, max_pages: int, scroll: bool = False) -> List[FetchResult]:
+        """Follow pagination without a page range: rel=next and "next" links (prefetched in a second
+        tab), then clickable next/load-more controls, then paginated JSON endpoints seen as XHR."""
+        tabs = [page, await page.context.new_page()]
+        tracker = PaginationTracker()
+        tasks: Dict[int, asyncio.Future] = {}
+        json_responses = []
+
+        def capture(response):
+            if response.request.resource_type in ("xhr", "fetch") and is_paginated_endpoint(response.url) \
+                    and "json" in response.headers.get("content-type", ""):
+                json_responses.append(response)
+        page.on("response", capture)
+
+        def start(i: int, url: str):
+            if i < max_pages and i not in tasks and tracker.visit(url):
+                self.logger.info(f"Scraping page {i + 1}: {url}")
+                tasks[i] = asyncio.ensure_future(self._fetch_in_tab(
+                    tabs[i % 2], url, tasks.get(i - 2), lambda tab: prefetch_next(i + 1, tab), scroll))
+
+        async def prefetch_next(i: int, tab: Page):
+            next_url = find_next_url(await tab.content(), tab.url)
+            if next_url:
+                start(i, next_url)
+
+        results = []
+        try:
+            start(0, base_url)
+            i = 0
+            while i in tasks:
+                result = await tasks[i]
+                if not result.ok or tracker.is_duplicate(result.content):
+                    if not result.ok:
+                        results.append(result)
+                    break
+                results.append(result)
+                if i + 1 not in tasks:
+                    next_url = find_next_url(result.content, result.url)
+                    if next_url:
+                        start(i + 1, next_url)
+                i += 1
+            if results and results[-1].ok and len(results) < max_pages:
+                last_tab = tabs[(len(results) - 1) % 2]
+                results += await self.scrape_by_clicking(last_tab, max_pages - len(results), tracker)
+            if len(results) == 1 and results[0].ok:
+                await self._scroll_to_bottom(page)
+                if json_responses:
+                    results += await self.fetch_json_pages(page, json_responses[-1], max_pages - 1, tracker)
+        finally:
+            page.remove_listener("response", capture)
+            await self._cancel_pending(tasks)
+            await self._close_extra_tabs(tabs)
+        return results
+
+    async def scrape_by_clicking(self, page: Page, max_pages: int, tracker: PaginationTracker) -> List[FetchResult]:
+        """Page through JS-driven pagination by clicking the first visible next or load-more control"""
+        results = []
+        while len(results) < max_pages:
+            control = None
+            for selector in NEXT_BUTTON_SELECTORS:
+                locator = page.locator(selector).first
+                try:
+                    if await locator.count() and await locator.is_visible():
+                        control = locator
+                        break
+                except Exception:
+                    continue
+            if control is None:
+                break
+            try:
+                await control.click(timeout=5000)
+                await page.wait_for_load_state(self.config.wait_for, timeout=self.config.timeout)
+                await asyncio.sleep(self.config.delay_after_load)
+                content = await page.content()
+            except Exception as e:
+                self.logger.info(f"Stopping click pagination: {str(e)}")
+                break
+            if tracker.is_duplicate(content):
+                break
+            self.logger.info(f"Scraped page {len(results) + 2} by clicking through to {page.url}")
+            results.append(FetchResult(page.url, content=content))
+        return results
+
+    async def fetch_json_pages(self, page: Page, first_response, max_pages: int,
+                               tracker: PaginationTracker) -> List[FetchResult]:
+        """Walk a paginated JSON endpoint the page called itself, reusing the page's cookies"""
+        results = []
+        try:
+            url, payload = first_response.url, await first_response.json()
+        except Exception as e:
+            self.logger.debug(f"Could not read XHR payload: {str(e)}")
+            return results
+
+        while len(results) < max_pages:
+            url = next_endpoint_url(url, payload)
+            if not url or not tracker.visit(url):
+                break
+            self.logger.info(f"Fetching XHR page {len(results) + 2}: {url}")
+            try:
+                response = await page.request.get(url, timeout=self.config.timeout)
+                if not response.ok:
+                    break
+                content = await response.text()
+                payload = json.loads(content)
+            except Exception as e:
+                self.logger.info(f"Stopping XHR pagination: {str(e)}")
+                break
+            if tracker.is_duplicate(content):
+                break
+            results.append(FetchResult(url, content=content, status=response.status))
+            await asyncio.sleep(random.uniform(0.5, 1))
+        return results
+
+    async def _fetch_in_tab(self, tab: Page, url: str, previous: Optional[asyncio.Future],
+                            on_navigated: Callable[[Page], Awaitable[None]], scroll: bool = False) -> FetchResult:
+        if previous is not None:
+            # The tab may still be settling on an earlier page
+            await asyncio.wait([previous])
+            await asyncio.sleep(random.uniform(0.5, 1))
+        return await self.navigate_and_get_content(tab, url, on_navigated, scroll)
+
+    async def _cancel_pending(self, tasks: Dict[int, asyncio.Future]):
+        pending = [task for task in tasks.values() if not task.done()]
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _close_extra_tabs(self, tabs: List[Page]):
+        for tab in tabs[1:]:
+            await tab.close()
+
+    async def _scroll_to_bottom(self, page: Page):
+        try:
+            await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+            await asyncio.sleep(self.config.delay_after_load)
+        except Exception as e:
+            self.logger.debug(f"Scroll failed: {str(e)}")
+
+    async def navigate_and_get_content(self, page: Page, url: str,
+                                       on_navigated: Optional[Callable[[Page], Awaitable[None]]] = None,
+                                       scroll: bool = False) -> FetchResult:
+        """Load a page, retrying timeouts, dropped connections, bot walls and retryable statuses
+        up to config.max_retries times with jittered exponential backoff"""
+        for attempt in range(1, self.config.max_retries + 2):
+            result = await self._navigate_once(page, url, on_navigated, scroll)
+            result.attempts = attempt
+            if result.ok or not result.retryable or attempt > self.config.max_retries:
+                break
+            delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+            self.logger.warning(f"Failed to load {result.describe()}, retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+        if not result.ok:
+            self.logger.error(f"Giving up on {result.describe()}")
+        return result
+
+    async def _navigate_once(self, page: Page, url: str,
+                             on_navigated: Optional[Callable[[Page], Awaitable[None]]] = None,
+                             scroll: bool = False) -> FetchResult:
+        tracer = get_tracer()
+        capture = NetworkCapture() if self.config.capture_json else None
+        if capture:
+            capture.attach(page)
         try:
             self.logger.info(f"Navigating to {url}")
-            await page.goto(url, wait_until=self.config.wait_for, timeout=self.config.timeout)
+            with tracer.span("navigation", url=url) as span:
+                response = await page.goto(url, wait_until=self.config.wait_for, timeout=self.config.timeout)
+                status = response.status if response else None
+                span.set_attribute("status", status)
+
+            if status and status >= 400 and not is_bot_wall(await page.content()):
+                return FetchResult(url, status=status, error_type=FetchErrorType.HTTP_STATUS, error=f"HTTP {status}")
             self.logger.info(f"Successfully loaded {url}")
+
+            if on_navigated:
+                try:
+                    await on_navigated(page)
+                except Exception as e:
+                    self.logger.debug(f"Navigation hook failed for {url}: {str(e)}")
+
+            if self.config.simulate_human:
+                with tracer.span("simulate_human"):
+                    await self.simulate_human_behavior(page)
             
-            await asyncio.sleep(self.config.delay_after_load)
+            with tracer.span("load_wait", seconds=self.config.delay_after_load):
+                await asyncio.sleep(self.config.delay_after_load)
             
             self.logger.info("Extracting page content")
-            content = await page.content()
+            if scroll:
+                with tracer.span("scroll_harvest") as span:
+                    content, harvested = await harvest_scroll(page, self.config.scroll_max_seconds,
+                                                              self.config.scroll_max_items)
+                    span.set_attribute("nodes", harvested)
+                    span.set_attribute("chars", len(content))
+            else:
+                with tracer.span("page_content") as span:
+                    content = await page.content()
+                    span.set_attribute("chars", len(content))
+
+            if is_bot_wall(content):
+                content = await self.solve_challenge(page, url) if self.config.bypass_cloudflare else None
+                if content is None:
+                    return FetchResult(url, status=status, error_type=FetchErrorType.BOT_WALL,
+                                       error="Challenge page served instead of content")
+                status = None
             self.logger.info(f"Successfully extracted content (length: {len(content)})")
-            return content
+            json_responses = await capture.collect() if capture else []
+            if json_responses:
+                self.logger.info(f"Captured {len(json_responses)} JSON responses")
+            return FetchResult(url, content=content, status=status, json_responses=json_responses)
         except Exception as e:
-            self.logger.error(f"Error navigating to {url}: {str(e)}")
-            return f"Error: Failed to load {url}. {str(e)}"
+            self.logger.debug(f"Error navigating to {url}: {str(e)}")
+            return FetchResult(url, error_type=classify_exception(e), error=str(e))
+        finally:
+            if capture:
+                capture.detach()
+
+    async def solve_challenge(self, page: Page, url: str) -> Optional[str]:
+        """Run bypass_cloudflare within config.challenge_timeout seconds and persist the
+        domain's cookies on success, so later fetches skip the challenge"""
+        self.logger.info(f"Challenge page detected on {url}, attempting bypass")
+        with get_tracer().span("challenge_bypass", url=url) as span:
+            try:
+                content = await asyncio.wait_for(self.bypass_cloudflare(page, url), timeout=self.config.challenge_timeout)
+            except asyncio.TimeoutError:
+                self.logger.warning(f"Challenge bypass timed out after {self.config.challenge_timeout}s")
+                content = None
+            solved = content is not None and not is_bot_wall(content)
+            span.set_attribute("solved", solved)
+
+        if not solved:
+            return None
+        self.session_store.save_state(url, await page.context.storage_state())
+        return content
 
     async def bypass_cloudflare(self, page: Page, url: str) -> str:
         max_retries = 3
-        for _ in range(max_retries):
-            await page.reload(wait_until=self.config.wait_for, timeout=self.config.timeout)
+        for attempt in range(max_retries):
+            # JS challenges usually clear themselves, so wait before reloading
             if self.config.simulate_human:
                 await self.simulate_human_behavior(page)
             else:
                 await asyncio.sleep(2)
 
             content = await page.content()
-            if "Cloudflare" not in content or "ray ID" not in content.lower():
+            if not is_bot_wall(content):
                 self.logger.info("Successfully bypassed Cloudflare")
                 return content
 
-            self.logger.info("Cloudflare still detected, retrying...")
+            if attempt < max_retries - 1:
+                self.logger.info("Cloudflare still detected, retrying...")
+                await page.reload(wait_until=self.config.wait_for, timeout=self.config.timeout)
 
         self.logger.warning("Failed to bypass Cloudflare after multiple attempts")
         return content
@@ -286,7 +576,10 @@ class PlaywrightScraper(BaseScraper):
         elements = await page.query_selector_all('a, button, input, select')
         if elements:
             random_element = random.choice(elements)
-            await random_element.hover()
+            try:
+                await random_element.hover(timeout=2000)
+            except Exception as e:
+                self.logger.debug(f"Hover skipped: {str(e)}")
             await asyncio.sleep(random.uniform(0.3, 0.7))
 
     def detect_url_pattern(self, url: str) -> Optional[str]:
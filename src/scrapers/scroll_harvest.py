@@ -0,0 +1,83 @@
+import asyncio
+import re
+import time
+from typing import List, Tuple
+
+from playwright.async_api import Page
+
+# Records element roots added after install; they are serialized when drained, so nodes that are
+# filled in after insertion are captured complete and nodes a virtualized list later removes are kept
+INSTALL_OBSERVER_JS = '''
+() => {
+    if (window.__scrollHarvest) return;
+    const harvest = window.__scrollHarvest = {pending: [], seen: new Set()};
+    const skip = new Set(['SCRIPT', 'STYLE', 'LINK', 'META', 'NOSCRIPT', 'TEMPLATE']);
+    new MutationObserver(mutations => {
+        for (const mutation of mutations) {
+            for (const node of mutation.addedNodes) {
+                if (node.nodeType === 1 && !skip.has(node.tagName)) harvest.pending.push(node);
+            }
+        }
+    }).observe(document.body, {childList: true, subtree: true});
+}
+'''
+
+DRAIN_JS = '''
+() => {
+    const harvest = window.__scrollHarvest;
+    const pending = harvest.pending.splice(0);
+    const roots = new Set(pending);
+    const nodes = [];
+    for (const node of pending) {
+        let parent = node.parentNode, nested = false;
+        while (parent) {
+            if (roots.has(parent)) { nested = true; break; }
+            parent = parent.parentNode;
+        }
+        if (nested) continue;
+        const text = (node.innerText || node.textContent || '').replace(/\\s+/g, ' ').trim();
+        if (text.length < 2 || harvest.seen.has(text)) continue;
+        harvest.seen.add(text);
+        nodes.push(node.outerHTML);
+    }
+    return {nodes: nodes, height: document.body.scrollHeight};
+}
+'''
+
+SCROLL_JS = "window.scrollTo(0, document.body.scrollHeight)"
+
+def _visible_text(html: str) -> str:
+    text = re.sub(r"<(script|style|noscript)\b.*?</\1>", " ", html, flags=re.S | re.I)
+    return " ".join(re.sub(r"<[^>]+>", " ", text).split())
+
+def merge_harvest(snapshot: str, nodes: List[str]) -> str:
+    """Append harvested nodes to the initial snapshot, dropping any whose text it already holds"""
+    snapshot_text = _visible_text(snapshot)
+    fresh = [node for node in nodes if _visible_text(node) not in snapshot_text]
+    if not fresh:
+        return snapshot
+    section = "<section data-scroll-harvest>\n" + "\n".join(fresh) + "\n</section>"
+    index = snapshot.lower().rfind("</body>")
+    return snapshot[:index] + section + snapshot[index:] if index >= 0 else snapshot + section
+
+async def harvest_scroll(page: Page, max_seconds: float, max_items: int, idle_rounds: int = 3,
+                         pause: float = 1.0) -> Tuple[str, int]:
+    """Scroll until the page stops growing or a time/item cap is hit, collecting only nodes added
+    along the way. Returns the merged document and the number of harvested nodes."""
+    await page.evaluate(INSTALL_OBSERVER_JS)
+    snapshot = await page.content()
+    nodes: List[str] = []
+    deadline = time.monotonic() + max_seconds
+    last_height, idle = 0, 0
+
+    while idle < idle_rounds and len(nodes) < max_items and time.monotonic() < deadline:
+        await page.evaluate(SCROLL_JS)
+        await asyncio.sleep(pause)
+        batch = await page.evaluate(DRAIN_JS)
+        nodes.extend(batch["nodes"])
+        grew = bool(batch["nodes"]) or batch["height"] > last_height
+        idle = 0 if grew else idle + 1
+        last_height = max(last_height, batch["height"])
+
+    nodes = nodes[:max_items]
+    return merge_harvest(snapshot, nodes), len(nodes)
@@ -0,0 +1,79 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+DEFAULT_SESSION_DIR = os.path.join(os.path.expanduser("~"), ".cyberscraper", "sessions")
+DEFAULT_SESSION_TTL = 7 * 24 * 3600
+
+def domain_key(url: str) -> str:
+    host = (urlparse(url).hostname or url).lower()
+    return host[4:] if host.startswith("www.") else host
+
+class SessionStore:
+    """Per-domain Playwright storage_state (cookies and localStorage) persisted to disk, so logins,
+    consent choices and solved challenges carry over to later fetches until they expire"""
+
+    def __init__(self, directory: str = DEFAULT_SESSION_DIR, ttl: float = DEFAULT_SESSION_TTL):
+        self.directory = directory
+        self.ttl = ttl
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+
+    def _path(self, domain: str) -> str:
+        safe = "".join(char if char.isalnum() or char in ".-" else "_" for char in domain)
+        return os.path.join(self.directory, f"{safe}.json")
+
+    def load_state(self, url: str) -> Optional[Dict[str, Any]]:
+        """Saved storage_state for the URL's domain, or None if there is none or it has expired"""
+        domain = domain_key(url)
+        with self._lock:
+            try:
+                with open(self._path(domain), "r") as f:
+                    saved = json.load(f)
+            except (OSError, ValueError):
+                return None
+
+        now = time.time()
+        if now - saved.get("saved_at", 0) > self.ttl:
+            self.invalidate(url)
+            return None
+        state = saved["storage_state"]
+        state["cookies"] = [cookie for cookie in state.get("cookies", [])
+                            if cookie.get("expires", -1) <= 0 or cookie["expires"] > now]
+        return state
+
+    def save_state(self, url: str, state: Dict[str, Any]):
+        if not state or not (state.get("cookies") or state.get("origins")):
+            return
+        domain = domain_key(url)
+        with self._lock:
+            try:
+                # Saved cookies are login credentials, so only the owner may read them
+                os.makedirs(self.directory, mode=0o700, exist_ok=True)
+                path = self._path(domain)
+                fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+                # os.open's mode only applies to new files, not ones saved before it was restricted
+                os.chmod(path, 0o600)
+                with os.fdopen(fd, "w") as f:
+                    json.dump({"saved_at": time.time(), "storage_state": state}, f)
+            except OSError as e:
+                self.logger.warning(f"Could not persist session for {domain}: {str(e)}")
+                return
+        self.logger.debug(f"Saved session for {domain} ({len(state.get('cookies', []))} cookies)")
+
+    def invalidate(self, url: str):
+        with self._lock:
+            try:
+                os.remove(self._path(domain_key(url)))
+            except OSError:
+                pass
+
+_store = SessionStore(os.getenv("CYBERSCRAPER_SESSION_DIR", DEFAULT_SESSION_DIR),
+                      float(os.getenv("CYBERSCRAPER_SESSION_TTL", DEFAULT_SESSION_TTL)))
+
+def get_session_store() -> SessionStore:
+    return _store
@@ -1,3 +1,4 @@
+import asyncio
 import requests
 import random
 import logging
@@ -24,6 +25,8 @@ class TorManager:
             'http': f'socks5h://127.0.0.1:{self.config.socks_port}',
             'https': f'socks5h://127.0.0.1:{self.config.socks_port}'
         }
+        self._session: Optional[requests.Session] = None
+        self._verified = False
         
     def _setup_logging(self):
         handler = logging.StreamHandler()
@@ -48,18 +51,28 @@ class TorManager:
         }
 
     def get_tor_session(self) -> requests.Session:
-        """Create a requests session that routes through Tor"""
-        session = requests.Session()
-        session.proxies = self.proxies
-        session.headers = self.get_headers()
-        return session
+        """Return the pooled requests session that routes through Tor"""
+        if self._session is None:
+            session = requests.Session()
+            session.proxies = self.proxies
+            session.headers = self.get_headers()
+            self._session = session
+        return self._session
+
+    def reset_session(self):
+        """Drop the pooled session so the next request opens fresh connections"""
+        if self._session is not None:
+            self._session.close()
+        self._session = None
+        self._verified = False
 
     async def verify_tor_connection(self) -> bool:
         """Verify Tor connection is working"""
         try:
             session = self.get_tor_session()
-            response = session.get('https://check.torproject.org/api/ip', 
-                                 timeout=self.config.timeout)
+            # requests blocks, and the event loop is shared by every session's jobs
+            response = await asyncio.to_thread(session.get, 'https://check.torproject.org/api/ip',
+                                               timeout=self.config.timeout)
             is_tor = response.json().get('IsTor', False)
             
             if is_tor:
@@ -88,16 +101,17 @@ class TorManager:
         try:
             session = self.get_tor_session()
             
-            if self.config.verify_connection:
-                await self.verify_tor_connection()
+            if self.config.verify_connection and not self._verified:
+                self._verified = await self.verify_tor_connection()
             
-            response = session.get(url, timeout=self.config.timeout)
+            response = await asyncio.to_thread(session.get, url, timeout=self.config.timeout)
             response.raise_for_status()
             
             self.logger.info(f"Successfully fetched content from {url}")
             return response.text
             
         except requests.RequestException as e:
+            self.reset_session()
             raise OnionServiceError(f"Failed to fetch onion content: {str(e)}")
         except Exception as e:
             raise TorException(f"Unexpected error fetching onion content: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,74 @@
+import hashlib
+import logging
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import List
+
+import tiktoken
+
+from .model_registry import get_model_capabilities
+
+APPROXIMATE_TOKENIZER = "approx"
+
+# Words are split into pieces of up to four characters and punctuation counts on its own,
+# which tracks SentencePiece/BPE counts for Gemini and Llama-family models closely on web text
+APPROXIMATE_TOKEN_PATTERN = re.compile(r"\w{1,4}|[^\w\s]")
+
+logger = logging.getLogger(__name__)
+
+class TokenCounter:
+    """Token counts for one tokenizer. Counts are cached by a digest of the text, so repeated
+    pages and chunks are counted once without the cache holding on to the text itself."""
+    name = APPROXIMATE_TOKENIZER
+
+    def __init__(self, cache_size: int = 4096):
+        self.cache_size = cache_size
+        self._counts: "OrderedDict[bytes, int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def count(self, text: str) -> int:
+        key = hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+        with self._lock:
+            if key in self._counts:
+                self._counts.move_to_end(key)
+                return self._counts[key]
+        count = self._count(text)
+        with self._lock:
+            self._counts[key] = count
+            while len(self._counts) > self.cache_size:
+                self._counts.popitem(last=False)
+        return count
+
+    def count_batch(self, texts: List[str]) -> List[int]:
+        return [self.count(text) for text in texts]
+
+    def _count(self, text: str) -> int:
+        return len(APPROXIMATE_TOKEN_PATTERN.findall(text))
+
+class TiktokenCounter(TokenCounter):
+    def __init__(self, encoding_name: str, cache_size: int = 4096):
+        super().__init__(cache_size)
+        self.name = encoding_name
+        self.encoding = tiktoken.get_encoding(encoding_name)
+
+    def count_batch(self, texts: List[str]) -> List[int]:
+        return [len(tokens) for tokens in self.encoding.encode_batch(texts, disallowed_special=())]
+
+    def _count(self, text: str) -> int:
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+@lru_cache(maxsize=None)
+def get_token_counter(tokenizer: str) -> TokenCounter:
+    """Shared counter per tokenizer name; falls back to the approximation if an encoding can't be loaded"""
+    if tokenizer == APPROXIMATE_TOKENIZER:
+        return TokenCounter()
+    try:
+        return TiktokenCounter(tokenizer)
+    except Exception as e:
+        logger.warning(f"Could not load tiktoken encoding {tokenizer}, using approximate counts: {str(e)}")
+        return TokenCounter()
+
+def get_token_counter_for_model(model_name: str) -> TokenCounter:
+    return get_token_counter(get_model_capabilities(model_name).tokenizer)
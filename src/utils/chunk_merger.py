@@ -0,0 +1,149 @@
+import difflib
+import json
+import logging
+import re
+from typing import Any, Dict, List, Optional
+
+from .dedup import record_key
+
+FENCE_PATTERN = re.compile(r"```(?:json|JSON)?\s*([\s\S]*?)\s*```")
+FIELD_MATCH_CUTOFF = 0.9
+# How many records back from a chunk boundary to look for a record the overlap cut in half
+BOUNDARY_WINDOW = 5
+
+def parse_chunk_result(text: str) -> Optional[Any]:
+    """JSON from an LLM chunk result, whether bare, inside a code fence or after a line of prose;
+    None when there is none"""
+    text = text.strip()
+    match = FENCE_PATTERN.search(text)
+    if match:
+        text = match.group(1)
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+    starts = [index for index in (text.find("["), text.find("{")) if index >= 0]
+    if not starts:
+        return None
+    try:
+        data, _ = json.JSONDecoder().raw_decode(text[min(starts):])
+        return data
+    except json.JSONDecodeError:
+        return None
+
+def field_key(name: str) -> str:
+    """Spelling-independent form of a field name: "Product Name", "product_name" and
+    "productNames" all become "productname" """
+    key = re.sub(r"[^a-z0-9]", "", str(name).lower())
+    return key[:-1] if key.endswith("s") and len(key) > 3 else key
+
+def _filled(record: Dict[str, Any]) -> Dict[str, str]:
+    return {key: record_key(value) for key, value in record.items() if value not in (None, "", [], {})}
+
+class JSONChunkMerger:
+    """Merges per-chunk LLM results into one list of records as they arrive.
+
+    Results can be added in any order; each is merged as soon as every earlier chunk has been, so
+    boundary checks always see the neighbouring chunk. Field names are reconciled against the
+    schema of the first records seen (case, separators, plurals and close misspellings), exact
+    repeats are dropped, and a record split by the chunk overlap is kept once in its most complete
+    form.
+    """
+
+    def __init__(self, boundary_window: int = BOUNDARY_WINDOW):
+        self.logger = logging.getLogger(__name__)
+        self.boundary_window = boundary_window
+        self.records: List[Any] = []
+        self.fields: List[str] = []
+        self.texts: List[str] = []
+        self.chunks_merged = 0
+        self.invalid_chunks = 0
+        self.duplicates_removed = 0
+        self.fields_renamed = 0
+        self._aliases: Dict[str, str] = {}
+        self._seen: Dict[str, int] = {}
+        self._pending: Dict[int, str] = {}
+        self._next_index = 0
+        self._boundary = 0
+
+    def add(self, index: int, result: str):
+        self._pending[index] = result
+        while self._next_index in self._pending:
+            self._merge_chunk(self._pending.pop(self._next_index))
+            self._next_index += 1
+
+    def _merge_chunk(self, result: str):
+        data = parse_chunk_result(result)
+        if data is None:
+            self.invalid_chunks += 1
+            self.texts.append(result.strip())
+            self.logger.warning(f"Chunk result is not JSON, skipping: {result[:100]}...")
+            return
+        self._boundary = len(self.records)
+        for item in (data if isinstance(data, list) else [data]):
+            self._merge_record(self._reconcile(item) if isinstance(item, dict) else item)
+        self.chunks_merged += 1
+
+    def _schema_name(self, name: str, taken: set) -> str:
+        """Schema field for a key, never one already used by another key of the same record (the
+        key keeps its own name then, e.g. "rating" and "ratings" side by side)"""
+        if name in self.fields:
+            return name
+        alias = self._aliases.get(name)
+        if alias is not None and alias not in taken:
+            return alias
+        key = field_key(name)
+        free = {field_key(field): field for field in self.fields if field not in taken}
+        if key in free:
+            target = free[key]
+        else:
+            close = difflib.get_close_matches(key, list(free), n=1, cutoff=FIELD_MATCH_CUTOFF)
+            target = free[close[0]] if close else None
+        if target is None:
+            self.fields.append(name)
+            return name
+        if name not in self._aliases:
+            self.fields_renamed += 1
+        self._aliases[name] = target
+        return target
+
+    def _reconcile(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        reconciled: Dict[str, Any] = {}
+        for name, value in record.items():
+            reconciled[self._schema_name(str(name), set(reconciled))] = value
+        return reconciled
+
+    def _merge_record(self, record: Any):
+        key = record_key(record)
+        if key in self._seen:
+            self.duplicates_removed += 1
+            return
+        if isinstance(record, dict) and self._boundary:
+            # Only records near the end of the previous chunk can be halves of this one
+            filled = _filled(record)
+            start = max(self._boundary - self.boundary_window, 0)
+            for position in range(start, self._boundary):
+                existing = self.records[position]
+                if not isinstance(existing, dict):
+                    continue
+                existing_filled = _filled(existing)
+                if filled.items() <= existing_filled.items():
+                    self.duplicates_removed += 1
+                    return
+                if existing_filled.items() <= filled.items():
+                    self._seen.pop(record_key(existing), None)
+                    self.records[position] = record
+                    self._seen[key] = position
+                    self.duplicates_removed += 1
+                    return
+        self._seen[key] = len(self.records)
+        self.records.append(record)
+
+    def result(self) -> str:
+        """Merged records as JSON, merging any chunks still waiting on an earlier one. When no chunk
+        held JSON, the chunks' text is returned instead so it can still be shown."""
+        for index in sorted(self._pending):
+            self._merge_chunk(self._pending.pop(index))
+        if not self.records and self.texts:
+            return "\n\n".join(self.texts)
+        return json.dumps(self.records)
@@ -0,0 +1,206 @@
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup, NavigableString, Tag
+
+# off: only the header/footer/nav/aside stripping that preprocessing always does
+# light: also drop blocks whose class, id or ARIA role marks them as boilerplate
+# balanced: also keep only the highest scoring content block and its strong siblings
+# aggressive: as balanced with a stricter sibling cutoff, and link lists inside the content removed
+AGGRESSIVENESS_LEVELS = ("off", "light", "balanced", "aggressive")
+DEFAULT_AGGRESSIVENESS = "off"
+
+# Blocks removed at "light" and above when a whole word of their class or id (split on separators
+# and camelCase) is one of these, and nothing else in the class or id looks like content, so
+# "price--promo" or "related-products-info" are kept
+BOILERPLATE_WORDS = {
+    "cookie", "cookies", "consent", "gdpr", "newsletter", "related", "recommended", "recommendations",
+    "promo", "promos", "promotion", "sponsor", "sponsored", "advert", "advertisement", "popup", "modal",
+    "subscribe", "signup", "social", "share", "sharing", "breadcrumb", "breadcrumbs",
+}
+BOILERPLATE_ROLES = {"banner", "navigation", "contentinfo", "complementary", "dialog", "alertdialog", "search"}
+# Class/id hints used to weight block scores
+NEGATIVE_PATTERN = re.compile(
+    r"sidebar|widget|menu|footer|header|masthead|comment|meta|byline|author|tags?\b|toolbar|pager|"
+    r"pagination|shopping|legal", re.I)
+POSITIVE_PATTERN = re.compile(
+    r"article|content|main|body|post|entry|story|text|product|item|result|listing|detail|price|"
+    r"table|data", re.I)
+
+TEXT_BLOCK_TAGS = {"p", "li", "td", "th", "dd", "dt", "pre", "blockquote", "h1", "h2", "h3", "h4",
+                   "h5", "h6"}
+CANDIDATE_TAGS = {"div", "section", "article", "main", "ul", "ol", "dl", "table", "tbody", "form", "body"}
+CLASS_WEIGHT = 25.0
+SIBLING_CUTOFF = {"balanced": 0.2, "aggressive": 0.5}
+# Fall back to the light result when the chosen block holds less than this share of the page text
+MIN_KEPT_RATIO = {"balanced": 0.25, "aggressive": 0.1}
+LINK_DENSE_THRESHOLD = 0.8
+
+def resolve_aggressiveness(level: Optional[str] = None) -> str:
+    """Aggressiveness from the argument or CYBERSCRAPER_CONTENT_EXTRACTION, defaulting to off"""
+    level = (level or os.getenv("CYBERSCRAPER_CONTENT_EXTRACTION") or DEFAULT_AGGRESSIVENESS).strip().lower()
+    if level not in AGGRESSIVENESS_LEVELS:
+        raise ValueError(f"Unknown content extraction level {level!r}, expected one of {', '.join(AGGRESSIVENESS_LEVELS)}")
+    return level
+
+def _hints(tag: Tag) -> str:
+    return " ".join(tag.get("class") or []) + " " + (tag.get("id") or "")
+
+def _hint_words(hints: str) -> List[str]:
+    hints = re.sub(r"([a-z0-9])([A-Z])", r"\1 \2", hints)
+    return [word for word in re.split(r"[^a-z0-9]+", hints.lower()) if word]
+
+def _is_boilerplate(tag: Tag) -> bool:
+    if tag.name in ("body", "html", "main", "article"):
+        return False
+    if (tag.get("role") or "").lower() in BOILERPLATE_ROLES:
+        return True
+    hints = _hints(tag)
+    if POSITIVE_PATTERN.search(hints):
+        return False
+    return any(word in BOILERPLATE_WORDS for word in _hint_words(hints))
+
+def remove_boilerplate(soup: BeautifulSoup) -> int:
+    """Drop cookie banners, share bars, related rails and similar blocks; returns how many"""
+    removed = 0
+    for tag in soup.find_all(True):
+        # Tags inside an already removed block are detached along with it
+        if tag.decomposed or tag.parent is None:
+            continue
+        if _is_boilerplate(tag):
+            tag.decompose()
+            removed += 1
+    return removed
+
+class _TextStats:
+    """Text and link-text lengths of every element, computed in one pass over the text nodes"""
+
+    def __init__(self, root: Tag):
+        self.text: Dict[int, int] = {}
+        self.links: Dict[int, int] = {}
+        for string in root.find_all(string=True):
+            length = len(string.strip())
+            if not length:
+                continue
+            in_link = False
+            for parent in string.parents:
+                if parent.name == "a":
+                    in_link = True
+                key = id(parent)
+                self.text[key] = self.text.get(key, 0) + length
+                if in_link:
+                    self.links[key] = self.links.get(key, 0) + length
+
+    def text_length(self, tag: Tag) -> int:
+        return self.text.get(id(tag), 0)
+
+    def link_density(self, tag: Tag) -> float:
+        length = self.text_length(tag)
+        return self.links.get(id(tag), 0) / length if length else 0.0
+
+def _class_weight(tag: Tag) -> float:
+    hints = _hints(tag)
+    weight = 0.0
+    if NEGATIVE_PATTERN.search(hints):
+        weight -= CLASS_WEIGHT
+    if POSITIVE_PATTERN.search(hints):
+        weight += CLASS_WEIGHT
+    if tag.name in ("article", "main"):
+        weight += CLASS_WEIGHT
+    return weight
+
+def score_blocks(root: Tag, stats: _TextStats) -> Dict[int, Tuple[Tag, float]]:
+    """Readability-style scores: each text block credits its parent in full and the two levels
+    above it partially, so the container that directly holds most of the text scores highest.
+    Scores are then weighted by class hints and discounted by link density."""
+    raw: Dict[int, float] = {}
+    tags: Dict[int, Tag] = {}
+    for block in root.find_all(TEXT_BLOCK_TAGS):
+        length = stats.text_length(block)
+        if length < 20:
+            continue
+        text = block.get_text(" ", strip=True)
+        contribution = 1 + text.count(",") + min(length / 100, 3)
+        ancestor = block.parent
+        for divider in (1, 2, 3):
+            if ancestor is None or not isinstance(ancestor, Tag) or ancestor.name == "[document]":
+                break
+            if ancestor.name in CANDIDATE_TAGS:
+                key = id(ancestor)
+                if key not in raw:
+                    raw[key] = _class_weight(ancestor)
+                    tags[key] = ancestor
+                raw[key] += contribution / divider
+            ancestor = ancestor.parent
+
+    return {key: (tags[key], score * (1 - stats.link_density(tags[key]))) for key, score in raw.items()}
+
+def _keep_only(page: Tag, kept: List[Tag]):
+    """Remove everything inside the page that is not a kept block, one of its ancestors or inside it"""
+    keep_ids = set()
+    for tag in kept:
+        keep_ids.add(id(tag))
+        keep_ids.update(id(parent) for parent in tag.parents)
+    for tag in kept:
+        for parent in [tag] + list(tag.parents):
+            # Other pages of a multi-page document are siblings of this one and stay
+            if parent is page or parent.parent is None:
+                break
+            for sibling in list(parent.parent.children):
+                if id(sibling) in keep_ids:
+                    continue
+                if isinstance(sibling, Tag):
+                    sibling.decompose()
+                elif isinstance(sibling, NavigableString):
+                    sibling.extract()
+
+def _remove_link_lists(root: Tag, stats: _TextStats) -> int:
+    removed = 0
+    for tag in root.find_all(["ul", "ol", "div", "section", "p"]):
+        if tag.decomposed or tag.parent is None:
+            continue
+        length = stats.text_length(tag)
+        if length and stats.link_density(tag) > LINK_DENSE_THRESHOLD and length < 500:
+            tag.decompose()
+            removed += 1
+    return removed
+
+def extract_main_content(soup: BeautifulSoup, aggressiveness: str = DEFAULT_AGGRESSIVENESS) -> BeautifulSoup:
+    """Trim the parsed page down to its main content in place. Expects scripts, styles and
+    comments to be gone already; returns the same soup for chaining. A document made of several
+    concatenated pages (multi-page scrapes) has each page trimmed on its own."""
+    if aggressiveness == "off":
+        return soup
+    remove_boilerplate(soup)
+    if aggressiveness == "light":
+        return soup
+
+    for page in soup.find_all("html", recursive=False) or [soup]:
+        _extract_page_content(page, aggressiveness)
+    return soup
+
+def _extract_page_content(page: Tag, aggressiveness: str):
+    root = page.body or page
+    stats = _TextStats(root)
+    total = stats.text_length(root)
+    scores = score_blocks(root, stats)
+    if not scores or not total:
+        return
+    top, top_score = max(scores.values(), key=lambda item: item[1])
+    if top_score <= 0 or top is root:
+        return
+
+    # Siblings that score close to the top block are part of the same content (e.g. article
+    # sections or listing cards split across containers)
+    cutoff = top_score * SIBLING_CUTOFF[aggressiveness]
+    kept = [top] + [sibling for sibling in top.parent.find_all(True, recursive=False)
+                    if sibling is not top and scores.get(id(sibling), (None, 0))[1] >= cutoff]
+    kept_length = sum(stats.text_length(tag) for tag in kept)
+    if kept_length < total * MIN_KEPT_RATIO[aggressiveness]:
+        return
+
+    _keep_only(page, kept)
+    if aggressiveness == "aggressive":
+        for tag in kept:
+            _remove_link_lists(tag, stats)
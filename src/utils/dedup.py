@@ -0,0 +1,121 @@
+import hashlib
+import json
+import re
+from typing import Any, Dict, List, Set, Tuple
+
+import numpy as np
+from bs4 import BeautifulSoup
+
+SHINGLE_SIZE = 4
+SIMHASH_BITS = 64
+# Fingerprints this many bits apart or closer count as the same text
+MAX_HAMMING_DISTANCE = 3
+MIN_BLOCK_CHARS = 40
+# Larger blocks are page containers rather than repeated chrome, and are costly to fingerprint
+MAX_BLOCK_CHARS = 5000
+BLOCK_TAGS = ["div", "section", "ul", "ol", "dl", "table", "form", "p", "article", "main"]
+
+_BIT_SHIFTS = np.arange(SIMHASH_BITS, dtype=np.uint64)
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> Set[str]:
+    """Overlapping word k-grams of the normalized text"""
+    words = re.findall(r"\w+", text.lower())
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+def simhash(text: str) -> int:
+    """64-bit SimHash over word shingles: texts that share most shingles get fingerprints that
+    differ in only a few bits"""
+    grams = shingles(text)
+    if not grams:
+        return 0
+    hashes = np.array([int.from_bytes(hashlib.blake2b(gram.encode(), digest_size=8).digest(), "little")
+                       for gram in grams], dtype=np.uint64)
+    bits = (hashes[:, None] >> _BIT_SHIFTS) & np.uint64(1)
+    votes = bits.sum(axis=0) * 2 > len(grams)
+    return int(sum(1 << int(bit) for bit in np.flatnonzero(votes)))
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+class SimHashIndex:
+    """Near-duplicate lookup. Fingerprints are split into MAX_HAMMING_DISTANCE + 1 bands, so any
+    two within the distance agree exactly on at least one band and only those are compared."""
+
+    def __init__(self, max_distance: int = MAX_HAMMING_DISTANCE):
+        self.max_distance = max_distance
+        self.band_bits = SIMHASH_BITS // (max_distance + 1)
+        self.bands: List[Dict[int, List[int]]] = [{} for _ in range(max_distance + 1)]
+
+    def _band_keys(self, fingerprint: int) -> List[int]:
+        mask = (1 << self.band_bits) - 1
+        return [(fingerprint >> (band * self.band_bits)) & mask for band in range(len(self.bands))]
+
+    def contains(self, fingerprint: int) -> bool:
+        for band, key in zip(self.bands, self._band_keys(fingerprint)):
+            for candidate in band.get(key, ()):
+                if hamming_distance(candidate, fingerprint) <= self.max_distance:
+                    return True
+        return False
+
+    def add(self, fingerprint: int):
+        for band, key in zip(self.bands, self._band_keys(fingerprint)):
+            band.setdefault(key, []).append(fingerprint)
+
+def _block_text(tag) -> str:
+    return " ".join(tag.get_text(" ", strip=True).split())
+
+def remove_repeated_blocks(soup: BeautifulSoup, min_chars: int = MIN_BLOCK_CHARS) -> List[str]:
+    """Drop blocks that repeat a near-duplicate of a block on an earlier page, in a document made
+    of several concatenated pages (multi-page scrapes). Repeats within a single page are left alone,
+    since listings legitimately repeat similar rows. Returns the text of the removed blocks."""
+    pages = soup.find_all("html", recursive=False)
+    if len(pages) < 2:
+        return []
+    index = SimHashIndex()
+    removed = []
+    for page in pages:
+        fingerprints = []
+        for tag in page.find_all(BLOCK_TAGS):
+            if tag.decomposed:
+                continue
+            text = _block_text(tag)
+            if not min_chars <= len(text) <= MAX_BLOCK_CHARS:
+                continue
+            fingerprint = simhash(text)
+            if index.contains(fingerprint):
+                removed.append(text)
+                tag.decompose()
+            else:
+                fingerprints.append(fingerprint)
+        # Registered after the page is done, so only earlier pages count as the original
+        for fingerprint in fingerprints:
+            index.add(fingerprint)
+    return removed
+
+def drop_duplicate_chunks(chunks: List[str]) -> Tuple[List[str], List[str]]:
+    """Chunks with a near-duplicate earlier chunk removed; returns (kept, dropped)"""
+    index = SimHashIndex()
+    kept, dropped = [], []
+    for chunk in chunks:
+        fingerprint = simhash(chunk)
+        if index.contains(fingerprint):
+            dropped.append(chunk)
+        else:
+            index.add(fingerprint)
+            kept.append(chunk)
+    return kept, dropped
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        return " ".join(value.split()).lower()
+    if isinstance(value, dict):
+        return {str(key).strip().lower(): _normalize(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_normalize(item) for item in value]
+    return value
+
+def record_key(record: Any) -> str:
+    """Identity of a record ignoring key case, whitespace and letter case in values"""
+    return json.dumps(_normalize(record), sort_keys=True, default=str)
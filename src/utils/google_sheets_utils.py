@@ -3,6 +3,9 @@ from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import Flow
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
+from googleapiclient.http import HttpRequest
+from google_auth_httplib2 import AuthorizedHttp
+import httplib2
 from google.auth.transport.requests import Request
 import pandas as pd
 from datetime import datetime
@@ -10,10 +13,21 @@ import os
 import json
 import hashlib
 import re
+import time
+import random
+import threading
 from io import BytesIO
 
 SCOPES = ['https://www.googleapis.com/auth/spreadsheets', 'https://www.googleapis.com/auth/drive.file']
 TOKEN_FILE = 'token.json'
+SHEET_RANGE = 'Sheet1'
+MAX_ROWS_PER_REQUEST = 5000
+MAX_CELLS_PER_REQUEST = 100000
+MAX_RETRIES = 5
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+_service_cache = {}
+_service_cache_lock = threading.Lock()
 
 def get_redirect_uri():
     return st.get_option("server.baseUrlPath") or "http://localhost:8501"
@@ -79,46 +93,96 @@ def save_credentials(creds):
         print(f"Error saving credentials: {str(e)}")
 
 def clean_data_for_sheets(df):
-    def clean_value(val):
-        if pd.isna(val):
-            return ""
-        if isinstance(val, (int, float)):
-            return str(val)
-        return str(val).replace('\n', ' ').replace('\r', '')
-
+    df = df.copy()
     for col in df.columns:
-        df[col] = df[col].map(clean_value)
+        values = df[col]
+        missing = values.isna()
+        cleaned = values.astype(object).astype(str)
+        # Numbers, booleans and dates never contain line breaks, so only text columns need the replaces
+        if values.dtype == object or pd.api.types.is_string_dtype(values.dtype):
+            cleaned = cleaned.str.replace('\n', ' ', regex=False).str.replace('\r', '', regex=False)
+        df[col] = cleaned.mask(missing, "") if missing.any() else cleaned
 
     if 'comments' in df.columns:
         df['comments'] = df['comments'].astype(str)
 
     return df
 
+def get_sheets_service(creds):
+    """Sheets client shared across Streamlit sessions. httplib2 connections are not thread-safe, so
+    every request gets its own authorized Http instead of the service's shared one."""
+    key = (creds.client_id, creds.refresh_token or creds.token)
+    with _service_cache_lock:
+        if key not in _service_cache:
+            def build_request(http, *args, **kwargs):
+                return HttpRequest(AuthorizedHttp(creds, http=httplib2.Http()), *args, **kwargs)
+
+            _service_cache[key] = build('sheets', 'v4', http=AuthorizedHttp(creds, http=httplib2.Http()),
+                                        requestBuilder=build_request, cache_discovery=False)
+        return _service_cache[key]
+
+def execute_with_retry(request):
+    for attempt in range(MAX_RETRIES):
+        try:
+            return request.execute()
+        except HttpError as error:
+            if error.resp.status not in RETRYABLE_STATUSES or attempt == MAX_RETRIES - 1:
+                raise
+            delay = min(2 ** attempt, 32) + random.uniform(0, 1)
+            print(f"Sheets API returned {error.resp.status}, retrying in {delay:.1f}s...")
+            time.sleep(delay)
+
+def iter_row_batches(values, num_columns):
+    batch_size = max(1, min(MAX_ROWS_PER_REQUEST, MAX_CELLS_PER_REQUEST // max(num_columns, 1)))
+    for start in range(0, len(values), batch_size):
+        yield values[start:start + batch_size]
+
+def append_rows(service, spreadsheet_id, df, include_header=False):
+    values = df.values.tolist()
+    if include_header:
+        values = [df.columns.tolist()] + values
+    for batch in iter_row_batches(values, len(df.columns)):
+        execute_with_retry(service.spreadsheets().values().append(
+            spreadsheetId=spreadsheet_id, range=SHEET_RANGE,
+            valueInputOption='RAW', insertDataOption='INSERT_ROWS', body={'values': batch}))
+
+def create_spreadsheet(service, title=None):
+    spreadsheet = {
+        'properties': {
+            'title': title or f"CyberScraper Data {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+        }
+    }
+    spreadsheet = execute_with_retry(service.spreadsheets().create(body=spreadsheet, fields='spreadsheetId'))
+    return spreadsheet.get('spreadsheetId')
+
+def append_to_google_sheets(data, spreadsheet_id, include_header=False):
+    """Append rows to an existing spreadsheet, e.g. as streaming results arrive."""
+    creds = get_google_sheets_credentials()
+    if not creds or not isinstance(data, pd.DataFrame):
+        return False
+
+    try:
+        append_rows(get_sheets_service(creds), spreadsheet_id, clean_data_for_sheets(data), include_header)
+        return True
+    except HttpError as error:
+        print(f"An HTTP error occurred: {error}")
+        return False
+    except Exception as e:
+        print(f"An error occurred: {str(e)}")
+        return False
+
 def upload_to_google_sheets(data):
     creds = get_google_sheets_credentials()
     if not creds:
         return None
 
-    try:
-        service = build('sheets', 'v4', credentials=creds)        
-        spreadsheet = {
-            'properties': {
-                'title': f"CyberScraper Data {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-            }
-        }
-        spreadsheet = service.spreadsheets().create(body=spreadsheet, fields='spreadsheetId').execute()
-        spreadsheet_id = spreadsheet.get('spreadsheetId')
-
-        if isinstance(data, pd.DataFrame):
-            df = clean_data_for_sheets(data)
-        else:
-            return None
+    if not isinstance(data, pd.DataFrame):
+        return None
 
-        values = [df.columns.tolist()] + df.values.tolist()
-        body = {'values': values}
-        result = service.spreadsheets().values().update(
-            spreadsheetId=spreadsheet_id, range='Sheet1',
-            valueInputOption='RAW', body=body).execute()
+    try:
+        service = get_sheets_service(creds)
+        spreadsheet_id = create_spreadsheet(service)
+        append_rows(service, spreadsheet_id, clean_data_for_sheets(data), include_header=True)
         return spreadsheet_id
     except HttpError as error:
         print(f"An HTTP error occurred: {error}")
@@ -1,7 +1,154 @@
+import logging
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+from urllib.parse import urlparse
+
+@dataclass
+class ProxyStats:
+    url: str
+    successes: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    latency_ewma: Optional[float] = None
+    quarantined_until: float = 0.0
+
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self.quarantined_until
+
+    @property
+    def success_rate(self) -> float:
+        # Laplace smoothing so untried proxies start out as good candidates
+        return (self.successes + 1) / (self.successes + self.failures + 2)
+
+    def score(self, default_latency: float) -> float:
+        return self.success_rate / max(self.latency_ewma or default_latency, 0.05)
+
+def normalize_proxy(proxy: str) -> str:
+    proxy = proxy.strip()
+    return proxy if "://" in proxy else f"http://{proxy}"
+
+def playwright_proxy(proxy: Optional[str]) -> Optional[Dict[str, str]]:
+    """Playwright proxy settings, with credentials split out of user:pass@host URLs"""
+    if not proxy:
+        return None
+    parsed = urlparse(proxy)
+    if not parsed.username:
+        return {"server": proxy}
+    server = f"{parsed.scheme}://{parsed.hostname}" + (f":{parsed.port}" if parsed.port else "")
+    return {"server": server, "username": parsed.username, "password": parsed.password or ""}
+
+def load_proxy_file(path: str) -> List[str]:
+    with open(path, "r") as f:
+        return [line.strip() for line in f if line.strip() and not line.strip().startswith("#")]
 
 class ProxyManager:
-    def __init__(self, proxy: str = None):
-        self.proxy = proxy
+    """Pool of proxies scored by success rate and latency.
+
+    Proxies come from the constructor (a single URL, a comma-separated string or a list), a file
+    with one proxy per line, or the CYBERSCRAPER_PROXIES / CYBERSCRAPER_PROXY_FILE environment
+    variables. get_proxy() picks a proxy at random weighted by score, so load spreads across the
+    pool while slow or failing proxies are picked less often. Proxies that fail repeatedly are
+    quarantined for a while. With no proxies configured, get_proxy() returns None.
+    """
+
+    def __init__(self, proxy: Union[str, Iterable[str], None] = None, proxy_file: Optional[str] = None,
+                 failure_threshold: int = 3, quarantine_seconds: float = 120.0, ewma_alpha: float = 0.3):
+        self.logger = logging.getLogger(__name__)
+        if proxy is None:
+            proxy = os.getenv("CYBERSCRAPER_PROXIES")
+        proxy_file = proxy_file or os.getenv("CYBERSCRAPER_PROXY_FILE")
+
+        proxies = proxy.split(",") if isinstance(proxy, str) else list(proxy or [])
+        if proxy_file:
+            proxies += load_proxy_file(proxy_file)
+        self.proxies: Dict[str, ProxyStats] = {}
+        for entry in proxies:
+            if entry.strip():
+                url = normalize_proxy(entry)
+                self.proxies.setdefault(url, ProxyStats(url))
+
+        self.failure_threshold = failure_threshold
+        self.quarantine_seconds = quarantine_seconds
+        self.ewma_alpha = ewma_alpha
+        self._lock = threading.Lock()
+
+    @property
+    def proxy(self) -> Optional[str]:
+        return next(iter(self.proxies), None)
+
+    def __len__(self) -> int:
+        return len(self.proxies)
+
+    async def get_proxy(self) -> Optional[str]:
+        return self.next_proxy()
+
+    def next_proxy(self) -> Optional[str]:
+        with self._lock:
+            if not self.proxies:
+                return None
+            candidates = [stats for stats in self.proxies.values() if stats.available]
+            if not candidates:
+                # Everything is quarantined; use the proxy that comes back soonest rather than none
+                return min(self.proxies.values(), key=lambda stats: stats.quarantined_until).url
+            latencies = [stats.latency_ewma for stats in candidates if stats.latency_ewma]
+            default_latency = sum(latencies) / len(latencies) if latencies else 1.0
+            weights = [stats.score(default_latency) for stats in candidates]
+            return random.choices(candidates, weights=weights)[0].url
+
+    def report_success(self, proxy: Optional[str], latency: float):
+        with self._lock:
+            stats = self.proxies.get(proxy)
+            if stats is None:
+                return
+            stats.successes += 1
+            stats.consecutive_failures = 0
+            stats.quarantined_until = 0.0
+            if stats.latency_ewma is None:
+                stats.latency_ewma = latency
+            else:
+                stats.latency_ewma = self.ewma_alpha * latency + (1 - self.ewma_alpha) * stats.latency_ewma
+
+    def report_failure(self, proxy: Optional[str], reason: str = ""):
+        with self._lock:
+            stats = self.proxies.get(proxy)
+            if stats is None:
+                return
+            stats.failures += 1
+            stats.consecutive_failures += 1
+            if stats.consecutive_failures >= self.failure_threshold:
+                stats.quarantined_until = time.monotonic() + self.quarantine_seconds
+                self.logger.warning(f"Quarantining proxy {proxy} for {self.quarantine_seconds:.0f}s: {reason}")
+
+    def requests_proxies(self, proxy: Optional[str] = None) -> Optional[Dict[str, str]]:
+        """Proxy mapping for requests/httpx style clients, rotating if no proxy is given"""
+        proxy = proxy or self.next_proxy()
+        return {"http": proxy, "https": proxy} if proxy else None
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {
+                url: {
+                    "available": stats.available,
+                    "success_rate": round(stats.success_rate, 3),
+                    "latency_ewma": stats.latency_ewma,
+                    "successes": stats.successes,
+                    "failures": stats.failures,
+                }
+                for url, stats in self.proxies.items()
+            }
+
+_managers: Dict[Tuple, ProxyManager] = {}
+_managers_lock = threading.Lock()
 
-    async def get_proxy(self) -> str:
-        return self.proxy
+def get_proxy_manager(proxy: Union[str, Iterable[str], None] = None) -> ProxyManager:
+    """Process-wide pool per proxy list, so health scores are shared by every WebExtractor"""
+    key = (proxy,) if proxy is None or isinstance(proxy, str) else tuple(proxy)
+    with _managers_lock:
+        if key not in _managers:
+            _managers[key] = ProxyManager(proxy)
+        return _managers[key]
@@ -0,0 +1,172 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_RETRIES = 4
+BASE_RETRY_DELAY = 1.0
+MAX_RETRY_DELAY = 30.0
+
+class TokenBucket:
+    """Thread-safe token bucket whose refill rate backs off on 429s and recovers on success.
+
+    State is guarded by a threading lock and waits use asyncio.sleep, so one bucket can be
+    shared by extractors running on different event loops.
+    """
+
+    def __init__(self, per_minute: float, min_fraction: float = 0.1, recovery: float = 1.05):
+        self.max_rate = per_minute / 60.0
+        self.min_rate = self.max_rate * min_fraction
+        self.rate = self.max_rate
+        self.capacity = max(1.0, per_minute / 6.0)
+        self.recovery = recovery
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self, cost: float = 1.0):
+        cost = min(cost, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self.blocked_until and self.tokens >= cost:
+                    self.tokens -= cost
+                    return
+                wait = max(self.blocked_until - now, (cost - self.tokens) / self.rate)
+            await asyncio.sleep(wait)
+
+    def on_rate_limited(self, retry_after: Optional[float] = None):
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = 0.0
+            if retry_after:
+                self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+
+    def on_success(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate * self.recovery)
+
+    def block_for(self, seconds: float):
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+class RateLimiter:
+    """Request and token buckets for one provider model, adapting to rate-limit headers and errors"""
+
+    def __init__(self, requests_per_minute: Optional[int] = None, tokens_per_minute: Optional[int] = None):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+
+    async def acquire(self, estimated_tokens: int = 0):
+        if self.requests:
+            await self.requests.acquire()
+        if self.tokens and estimated_tokens:
+            await self.tokens.acquire(estimated_tokens)
+
+    def _buckets(self):
+        return [bucket for bucket in (self.requests, self.tokens) if bucket]
+
+    def on_success(self):
+        for bucket in self._buckets():
+            bucket.on_success()
+
+    def on_rate_limited(self, retry_after: Optional[float] = None):
+        for bucket in self._buckets():
+            bucket.on_rate_limited(retry_after)
+
+    def update_from_headers(self, headers: Dict[str, str]):
+        """Pause a bucket until the reset time when a failed response's OpenAI-style
+        x-ratelimit-remaining/reset headers say it is used up. Successful responses don't expose
+        their headers through the LLM clients, so this only sees error responses."""
+        for kind, bucket in (("requests", self.requests), ("tokens", self.tokens)):
+            remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+            reset = parse_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+            if bucket and remaining is not None and reset and int(float(remaining)) == 0:
+                bucket.block_for(reset)
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Parse header durations such as '20', '1.5s', '250ms' or '1m30s' into seconds"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    total, number = 0.0, ""
+    i = 0
+    while i < len(value):
+        char = value[i]
+        if char.isdigit() or char == ".":
+            number += char
+        elif value.startswith("ms", i):
+            total += float(number or 0) / 1000
+            number = ""
+            i += 1
+        elif char in "hms":
+            total += float(number or 0) * {"h": 3600, "m": 60, "s": 1}[char]
+            number = ""
+        else:
+            return None
+        i += 1
+    return total
+
+def get_response_headers(error: BaseException) -> Dict[str, str]:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or getattr(error, "headers", None) or {}
+    try:
+        return {k.lower(): v for k, v in dict(headers).items()}
+    except Exception:
+        return {}
+
+def get_retry_after(error: BaseException) -> Optional[float]:
+    headers = get_response_headers(error)
+    return parse_duration(headers.get("retry-after")) or parse_duration(headers.get("retry-after-ms", "") and
+                                                                       f"{headers['retry-after-ms']}ms")
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+def get_rate_limiter(key: str, requests_per_minute: Optional[int] = None,
+                     tokens_per_minute: Optional[int] = None) -> RateLimiter:
+    """Process-wide limiter so every WebExtractor shares one budget per provider model"""
+    with _limiters_lock:
+        if key not in _limiters:
+            _limiters[key] = RateLimiter(requests_per_minute, tokens_per_minute)
+        return _limiters[key]
+
+async def call_with_retry(call: Callable[[], Awaitable[Any]], limiter: Optional[RateLimiter] = None,
+                          is_retryable: Callable[[BaseException], bool] = lambda e: False,
+                          is_rate_limit: Callable[[BaseException], bool] = lambda e: False,
+                          estimated_tokens: int = 0, max_retries: int = DEFAULT_MAX_RETRIES) -> Any:
+    """Run an idempotent call under the limiter, retrying transient errors with full-jitter backoff"""
+    for attempt in range(max_retries + 1):
+        if limiter:
+            await limiter.acquire(estimated_tokens)
+        try:
+            result = await call()
+        except Exception as e:
+            retry_after = get_retry_after(e)
+            if limiter:
+                limiter.update_from_headers(get_response_headers(e))
+                if is_rate_limit(e):
+                    limiter.on_rate_limited(retry_after)
+            if attempt == max_retries or not is_retryable(e):
+                raise
+            delay = max(retry_after or 0.0, random.uniform(0, min(MAX_RETRY_DELAY, BASE_RETRY_DELAY * 2 ** attempt)))
+            logger.warning(f"LLM call failed ({str(e)}), retry {attempt + 1}/{max_retries} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            continue
+        if limiter:
+            limiter.on_success()
+        return result
@@ -0,0 +1,110 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Hashable, Optional
+
+import google.generativeai as genai
+from langchain_google_genai import ChatGoogleGenerativeAI
+
+from ..models import Models
+from ..ollama_models import OllamaModel, OllamaModelManager
+from ..scrapers.playwright_scraper import PlaywrightScraper, ScraperConfig
+from ..scrapers.tor.tor_scraper import TorScraper
+from ..scrapers.tor.tor_config import TorConfig
+
+_lock = threading.Lock()
+_llm_clients: Dict[Hashable, Any] = {}
+_playwright_scrapers: Dict[Hashable, PlaywrightScraper] = {}
+_tor_scrapers: Dict[Hashable, TorScraper] = {}
+
+def _config_key(config: Any) -> str:
+    return json.dumps(vars(config), sort_keys=True, default=str)
+
+def _create_llm_client(model_name: str, model_kwargs: Dict[str, Any]):
+    if model_name.startswith("ollama:"):
+        return OllamaModelManager.get_model(model_name[7:])
+    elif model_name.startswith("gemini-"):
+        genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+        return ChatGoogleGenerativeAI(model=model_name, **model_kwargs)
+    else:
+        return Models.get_model(model_name, **model_kwargs)
+
+def get_llm_client(model_name, model_kwargs: Optional[Dict[str, Any]] = None):
+    """Return the process-wide client for a model, creating it on first use"""
+    if isinstance(model_name, OllamaModel):
+        return model_name
+    model_kwargs = model_kwargs or {}
+    key = (model_name, json.dumps(model_kwargs, sort_keys=True, default=str))
+    with _lock:
+        if key not in _llm_clients:
+            _llm_clients[key] = _create_llm_client(model_name, model_kwargs)
+        return _llm_clients[key]
+
+def get_playwright_scraper(config: ScraperConfig) -> PlaywrightScraper:
+    """Return a shared PlaywrightScraper for this config so a connected Chrome is reused"""
+    key = _config_key(config)
+    with _lock:
+        if key not in _playwright_scrapers:
+            _playwright_scrapers[key] = PlaywrightScraper(config=config)
+        return _playwright_scrapers[key]
+
+def get_tor_scraper(config: TorConfig) -> TorScraper:
+    """Return a shared TorScraper for this config so its Tor session is reused"""
+    key = _config_key(config)
+    with _lock:
+        if key not in _tor_scrapers:
+            _tor_scrapers[key] = TorScraper(config)
+        return _tor_scrapers[key]
+
+@dataclass
+class CachedContent:
+    raw_content: str
+    preprocessed_content: str
+    structured_data: Any = None
+    fetched_at: float = field(default_factory=time.time)
+
+class ContentCache:
+    """Thread-safe LRU of fetched pages and their preprocessed text, keyed by fetch request"""
+
+    def __init__(self, max_entries: int = 64, ttl: float = 900):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, CachedContent]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[CachedContent]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.time() - entry.fetched_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: Hashable, raw_content: str, preprocessed_content: str,
+            structured_data: Any = None) -> CachedContent:
+        entry = CachedContent(raw_content, preprocessed_content, structured_data)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+content_cache = ContentCache(
+    max_entries=int(os.getenv("CYBERSCRAPER_CONTENT_CACHE_SIZE", "64")),
+    ttl=float(os.getenv("CYBERSCRAPER_CONTENT_CACHE_TTL", "900"))
+)
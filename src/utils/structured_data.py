@@ -0,0 +1,245 @@
+import html as html_lib
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+
+MIN_RECORDS = 2
+MIN_FIELDS = 2
+
+# Query words that describe the output rather than a field to extract
+QUERY_STOPWORDS = {
+    "a", "an", "and", "all", "any", "as", "at", "by", "data", "details", "each", "every", "export",
+    "extract", "fetch", "for", "format", "from", "get", "give", "in", "including", "info", "information",
+    "into", "is", "it", "its", "list", "me", "of", "on", "or", "out", "please", "pull", "return", "scrape",
+    "show", "table", "that", "the", "their", "them", "these", "this", "those", "to", "with", "what",
+    "csv", "json", "excel", "sql", "html", "xlsx", "file", "page", "website", "site",
+}
+
+JSON_SCRIPT_PATTERN = re.compile(
+    r"<script\b([^>]*)>(.*?)</script>", re.S | re.I)
+META_PATTERN = re.compile(r"<meta\b[^>]*>", re.I)
+META_ATTR_PATTERN = re.compile(r"""(property|name|content)\s*=\s*("[^"]*"|'[^']*')""", re.I)
+# Framework state assigned to window globals, e.g. window.__INITIAL_STATE__ = {...};
+STATE_ASSIGNMENT_PATTERN = re.compile(
+    r"window\.(__[A-Z0-9_]+__|__NUXT__)\s*=\s*(\{.*\}|\[.*\])\s*;?\s*$", re.S)
+HYDRATION_SCRIPT_IDS = ("__NEXT_DATA__", "__NUXT_DATA__", "__APOLLO_STATE__", "__INITIAL_STATE__")
+META_PREFIXES = ("og:", "product:", "article:", "twitter:")
+ENTITY_SOURCES = ("#json-ld", "#microdata", "#meta")
+
+@dataclass
+class StructuredData:
+    """Records found in JSON the page loaded, flattened to dotted field names"""
+    records: List[Dict[str, Any]]
+    fields: List[str]
+    source: str
+    path: str = ""
+    names: List[str] = field(default_factory=list)
+
+    def to_json(self, fields: Optional[List[str]] = None) -> str:
+        return json.dumps(project_records(self.records, fields or self.fields))
+
+def _words(name: str) -> List[str]:
+    name = re.sub(r"([a-z0-9])([A-Z])", r"\1 \2", name)
+    return [word for word in re.split(r"[^a-zA-Z0-9]+", name.lower()) if word]
+
+def _singular(word: str) -> str:
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith("s") and not word.endswith("ss") and len(word) > 3:
+        return word[:-1]
+    return word
+
+def flatten_record(record: Dict[str, Any], prefix: str = "", depth: int = 0, max_depth: int = 2) -> Dict[str, Any]:
+    flat = {}
+    for key, value in record.items():
+        name = f"{prefix}.{key}" if prefix else str(key)
+        if isinstance(value, dict) and depth < max_depth:
+            flat.update(flatten_record(value, name, depth + 1, max_depth))
+        elif isinstance(value, list) and all(not isinstance(item, (dict, list)) for item in value):
+            flat[name] = ", ".join(str(item) for item in value)
+        elif isinstance(value, (dict, list)):
+            continue
+        else:
+            flat[name] = value
+    return flat
+
+def find_record_lists(data: Any, path: str = "", depth: int = 0) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+    """Lists of objects anywhere in a JSON document, with their dotted paths"""
+    if depth > 6:
+        return
+    if isinstance(data, list):
+        records = [item for item in data if isinstance(item, dict)]
+        if len(records) >= MIN_RECORDS and len(records) >= len(data) * 0.8:
+            yield path, records
+        for item in data[:5]:
+            if isinstance(item, (dict, list)):
+                yield from find_record_lists(item, path, depth + 1)
+    elif isinstance(data, dict):
+        for key, value in data.items():
+            if isinstance(value, (dict, list)):
+                yield from find_record_lists(value, f"{path}.{key}" if path else str(key), depth + 1)
+
+def extract_records(payloads: List[Tuple[str, Any]]) -> List[StructuredData]:
+    """Consistent record lists across captured payloads, largest first. Lists at the same path
+    in several payloads (e.g. one per page) are combined."""
+    groups: Dict[str, Tuple[str, List[Dict[str, Any]]]] = {}
+    for source, payload in payloads:
+        for path, records in find_record_lists(payload):
+            groups.setdefault(path, (source, []))[1].extend(flatten_record(record) for record in records)
+
+    found = []
+    for path, (source, flat) in groups.items():
+        key_counts: Dict[str, int] = {}
+        for record in flat:
+            for key in record:
+                key_counts[key] = key_counts.get(key, 0) + 1
+        # Keep fields present in at least half the records, in first-seen order
+        fields = [key for key, count in key_counts.items() if count >= len(flat) / 2]
+        if len(fields) >= MIN_FIELDS:
+            found.append(StructuredData(flat, fields, source, path, _words(path)))
+    return sorted(found, key=lambda data: len(data.records) * len(data.fields), reverse=True)
+
+def project_records(records: List[Dict[str, Any]], fields: List[str]) -> List[Dict[str, Any]]:
+    return [{name: record.get(name) for name in fields} for record in records]
+
+def match_query_fields(data: StructuredData, query: str) -> Tuple[List[str], List[str]]:
+    """Fields the query asks for, and query terms that matched no field or the record list itself"""
+    terms = [_singular(word) for word in _words(query) if word not in QUERY_STOPWORDS and not word.isdigit()]
+    list_words = {_singular(word) for word in data.names}
+    field_words = {name: {_singular(word) for word in _words(name)} for name in data.fields}
+
+    matched, unmatched = [], []
+    for term in dict.fromkeys(terms):
+        candidates = [name for name, words in field_words.items() if term in words]
+        if candidates:
+            # Prefer top-level fields; a nested object named by the term contributes all its fields
+            depth = min(name.count(".") for name in candidates)
+            matched.extend(name for name in candidates if name.count(".") == depth and name not in matched)
+        elif term not in list_words:
+            unmatched.append(term)
+    return matched, unmatched
+
+def query_names_type(data: StructuredData, query: str) -> bool:
+    """Whether the query names the record list or entity itself, e.g. "product" for a Product entity"""
+    names = {_singular(word) for word in data.names}
+    return any(_singular(word) in names for word in _words(query))
+
+def compact_records(data: StructuredData, fields: Optional[List[str]] = None, max_records: Optional[int] = None) -> str:
+    """Tab-separated view of the records (or field: value lines for a single entity), far smaller
+    than the rendered page for the LLM to read"""
+    fields = fields or data.fields
+    if len(data.records) == 1:
+        record = data.records[0]
+        return "\n".join(f"{name}: {record[name]}" for name in fields if record.get(name) not in (None, ""))
+    lines = ["\t".join(fields)]
+    for record in data.records[:max_records]:
+        lines.append("\t".join("" if record.get(name) is None else
+                               str(record.get(name)).replace("\t", " ").replace("\n", " ") for name in fields))
+    return "\n".join(lines)
+
+def select_for_query(candidates: List[StructuredData], query: str) -> Optional[Tuple[StructuredData, List[str], List[str]]]:
+    """The candidate that covers the most of what the query asks for, with its matched fields and
+    unmatched terms; None when no candidate matches any field"""
+    best, best_key = None, None
+    for rank, data in enumerate(candidates):
+        matched, unmatched = match_query_fields(data, query)
+        if not matched:
+            continue
+        key = (not unmatched, len(matched), -len(unmatched), -rank)
+        if best_key is None or key > best_key:
+            best, best_key = (data, matched, unmatched), key
+    return best
+
+def _parse_json(text: str) -> Any:
+    try:
+        return json.loads(text)
+    except ValueError:
+        return None
+
+def _json_ld_entities(payload: Any) -> Iterator[Dict[str, Any]]:
+    if isinstance(payload, list):
+        for item in payload:
+            yield from _json_ld_entities(item)
+    elif isinstance(payload, dict):
+        if "@graph" in payload:
+            yield from _json_ld_entities(payload["@graph"])
+        else:
+            yield payload
+
+def _microdata_item(element) -> Dict[str, Any]:
+    item: Dict[str, Any] = {}
+    if element.get("itemtype"):
+        item["@type"] = element["itemtype"].rstrip("/").rsplit("/", 1)[-1]
+    for prop in element.find_all(attrs={"itemprop": True}):
+        # Only properties that belong to this item, not to a nested one
+        if prop.find_parent(attrs={"itemscope": True}) is not element:
+            continue
+        if prop.has_attr("itemscope"):
+            value = _microdata_item(prop)
+        else:
+            value = prop.get("content") or prop.get("href") or prop.get("src") or prop.get_text(" ", strip=True)
+        name = prop["itemprop"].split()[0]
+        if name in item:
+            item[name] = item[name] if isinstance(item[name], list) else [item[name]]
+            item[name].append(value)
+        else:
+            item[name] = value
+    return item
+
+def extract_embedded_payloads(html: str, source: str = "page") -> List[Tuple[str, Any]]:
+    """JSON-LD, microdata, OpenGraph-style meta tags and hydration state embedded in the raw HTML,
+    as (source, payload) pairs; must run before scripts are stripped"""
+    payloads: List[Tuple[str, Any]] = []
+    json_ld: List[Dict[str, Any]] = []
+
+    for attrs, body in JSON_SCRIPT_PATTERN.findall(html):
+        attrs_lower = attrs.lower()
+        if "application/ld+json" in attrs_lower:
+            json_ld.extend(_json_ld_entities(_parse_json(body.strip())))
+        elif any(script_id.lower() in attrs_lower for script_id in HYDRATION_SCRIPT_IDS):
+            data = _parse_json(body.strip())
+            if data is not None:
+                payloads.append((f"{source}#hydration", data))
+        elif "__" in body and "window." in body:
+            match = STATE_ASSIGNMENT_PATTERN.search(body.strip())
+            data = _parse_json(match.group(2)) if match else None
+            if data is not None:
+                payloads.append((f"{source}#{match.group(1)}", data))
+
+    if json_ld:
+        payloads.append((f"{source}#json-ld", json_ld if len(json_ld) > 1 else json_ld[0]))
+
+    meta: Dict[str, Any] = {}
+    for tag in META_PATTERN.findall(html):
+        attrs = {key.lower(): html_lib.unescape(value[1:-1]) for key, value in META_ATTR_PATTERN.findall(tag)}
+        key = attrs.get("property") or attrs.get("name") or ""
+        if key.startswith(META_PREFIXES) and attrs.get("content"):
+            meta[key.split(":", 1)[1].replace(":", ".") if key.startswith("og:") else key.replace(":", ".")] = attrs["content"]
+    if meta:
+        payloads.append((f"{source}#meta", meta))
+
+    if "itemscope" in html:
+        soup = BeautifulSoup(html, "html.parser")
+        items = [_microdata_item(element) for element in soup.find_all(attrs={"itemscope": True})
+                 if element.find_parent(attrs={"itemscope": True}) is None]
+        if items:
+            payloads.append((f"{source}#microdata", items if len(items) > 1 else items[0]))
+    return payloads
+
+def extract_entity(payloads: List[Tuple[str, Any]]) -> Optional[StructuredData]:
+    """The richest single JSON-LD, microdata or meta object (e.g. one Product or Article)"""
+    best, best_fields = None, 0
+    for source, payload in payloads:
+        if not source.endswith(ENTITY_SOURCES):
+            continue
+        for entity in _json_ld_entities(payload):
+            flat = {key: value for key, value in flatten_record(entity).items()
+                    if not key.startswith("@context") and value not in (None, "")}
+            if len(flat) > best_fields:
+                best_fields = len(flat)
+                names = _words(str(entity.get("@type", "")))
+                best = StructuredData([flat], list(flat), source, "", names)
+    return best if best_fields >= MIN_FIELDS else None
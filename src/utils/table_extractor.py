@@ -0,0 +1,180 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup, Tag
+
+from .structured_data import StructuredData, _singular, _words, match_query_fields
+
+MIN_ROWS = 2
+MIN_COLUMNS = 2
+TABLE_WORDS = {"table"}
+
+def _cell_text(cell: Tag) -> str:
+    return " ".join(cell.get_text(" ", strip=True).split())
+
+def _rows(table: Tag) -> List[Tag]:
+    """Rows of this table only, not of tables nested inside its cells"""
+    return [row for row in table.find_all("tr") if row.find_parent("table") is table]
+
+def table_grid(table: Tag) -> Tuple[List[List[str]], int]:
+    """Cell texts laid out on a grid with colspan/rowspan expanded, and the number of leading
+    rows that are headers (th-only rows or rows inside thead)"""
+    grid: List[List[str]] = []
+    pending: Dict[int, Tuple[str, int]] = {}
+    header_rows = 0
+    counting_headers = True
+    for row in _rows(table):
+        cells = row.find_all(["td", "th"], recursive=False)
+        values: List[str] = []
+        column = 0
+        for cell in cells:
+            while column in pending:
+                text, remaining = pending.pop(column)
+                values.append(text)
+                if remaining > 1:
+                    pending[column] = (text, remaining - 1)
+                column += 1
+            text = _cell_text(cell)
+            span = int(cell.get("colspan", 1)) if str(cell.get("colspan", 1)).isdigit() else 1
+            rowspan = int(cell.get("rowspan", 1)) if str(cell.get("rowspan", 1)).isdigit() else 1
+            for _ in range(max(span, 1)):
+                values.append(text)
+                if rowspan > 1:
+                    pending[column] = (text, rowspan - 1)
+                column += 1
+        while column in pending:
+            text, remaining = pending.pop(column)
+            values.append(text)
+            if remaining > 1:
+                pending[column] = (text, remaining - 1)
+            column += 1
+        if not any(values):
+            continue
+        is_header = row.find_parent("thead") is not None or all(cell.name == "th" for cell in cells)
+        if counting_headers and is_header:
+            header_rows += 1
+        else:
+            counting_headers = False
+        grid.append(values)
+    return grid, header_rows
+
+def is_data_table(table: Tag) -> bool:
+    """Tables holding rows of data, as opposed to tables used for page layout"""
+    if (table.get("role") or "").lower() in ("presentation", "none"):
+        return False
+    if table.find("table"):
+        return False
+    rows = _rows(table)
+    if len(rows) < MIN_ROWS:
+        return False
+    widths = [len(row.find_all(["td", "th"], recursive=False)) for row in rows]
+    if max(widths) < MIN_COLUMNS:
+        return False
+    if table.find("th"):
+        return True
+    # Without header cells, require a consistent column count
+    return widths.count(max(set(widths), key=widths.count)) >= len(widths) * 0.8
+
+def _unique_names(names: List[str]) -> List[str]:
+    seen: Dict[str, int] = {}
+    unique = []
+    for index, name in enumerate(names):
+        name = name or f"column_{index + 1}"
+        seen[name] = seen.get(name, 0) + 1
+        unique.append(name if seen[name] == 1 else f"{name}_{seen[name]}")
+    return unique
+
+def _table_names(table: Tag) -> List[str]:
+    """Words describing the table: caption, id, aria-label and the closest preceding heading"""
+    parts = [table.get("id") or "", table.get("aria-label") or "", table.get("summary") or ""]
+    if table.caption:
+        parts.append(_cell_text(table.caption))
+    heading = table.find_previous(re.compile(r"^h[1-6]$"))
+    if heading:
+        parts.append(_cell_text(heading))
+    return [word for part in parts for word in _words(part)]
+
+def table_records(table: Tag) -> Optional[Tuple[List[Dict[str, str]], List[str]]]:
+    """Rows as dicts keyed by the header, or a single record for key/value tables whose rows
+    each start with a header cell; None for layout tables"""
+    if not is_data_table(table):
+        return None
+    grid, header_rows = table_grid(table)
+    if not grid:
+        # Every cell is empty, e.g. a table of images
+        return None
+    width = max(len(row) for row in grid)
+    grid = [row + [""] * (width - len(row)) for row in grid]
+
+    first_cells = [row.find(["td", "th"], recursive=False) for row in _rows(table)]
+    if header_rows == 0 and width == 2 and all(cell is not None and cell.name == "th" for cell in first_cells):
+        record = {key: value for key, value in grid if key}
+        return ([record], list(record)) if len(record) >= MIN_COLUMNS else None
+
+    if header_rows:
+        # Stacked header rows are joined per column, e.g. "Price" over "USD" becomes "Price USD"
+        header = [" ".join(dict.fromkeys(row[column] for row in grid[:header_rows] if row[column]))
+                  for column in range(width)]
+    else:
+        header = [f"column_{column + 1}" for column in range(width)]
+    fields = _unique_names(header)
+    body = grid[header_rows:]
+    if not body:
+        return None
+    records = [dict(zip(fields, row)) for row in body]
+    # Drop columns that are empty in every row (spacers, icon-only cells)
+    fields = [name for name in fields if any(record[name] for record in records)]
+    records = [{name: record[name] for name in fields} for record in records]
+    return (records, fields) if len(fields) >= MIN_COLUMNS else None
+
+def extract_tables(documents: List[Tuple[str, str]]) -> List[StructuredData]:
+    """Data tables in the given (source, html) pages as record sets. Tables with the same columns
+    on several pages (a paginated table) are combined."""
+    groups: Dict[Tuple[str, ...], StructuredData] = {}
+    for source, html in documents:
+        if "<table" not in html.lower():
+            continue
+        soup = BeautifulSoup(html, "html.parser")
+        for index, table in enumerate(soup.find_all("table")):
+            parsed = table_records(table)
+            if not parsed:
+                continue
+            records, fields = parsed
+            key = tuple(fields)
+            if key in groups:
+                groups[key].records.extend(records)
+            else:
+                groups[key] = StructuredData(records, fields, f"{source}#table-{index + 1}", "", _table_names(table))
+    return sorted(groups.values(), key=lambda data: len(data.records) * len(data.fields), reverse=True)
+
+def render_table(table: Tag) -> Optional[str]:
+    """Tab-separated rows for a data table, so the prompt keeps the row structure instead of one
+    cell per line; None for layout tables"""
+    parsed = table_records(table)
+    if not parsed:
+        return None
+    records, fields = parsed
+    if len(records) == 1 and not fields[0].startswith("column_"):
+        return "\n".join(f"{name}: {value}" for name, value in records[0].items() if value)
+    lines = [] if fields[0].startswith("column_") else ["\t".join(fields)]
+    lines.extend("\t".join(record[name].replace("\t", " ") for name in fields) for record in records)
+    return "\n".join(lines)
+
+def select_table_for_query(candidates: List[StructuredData], query: str) -> Optional[StructuredData]:
+    """The table a query asks for as a whole ("export the pricing table as csv"): the one whose
+    caption, id or heading shares the most words with the query, else the largest. None when the
+    query also names some of its columns, since then only those columns are wanted, or asks for
+    anything else about the table ("how many rows", "summarize"), which needs the LLM."""
+    words = {_singular(word) for word in _words(query)}
+    if not words & TABLE_WORDS:
+        return None
+    tables = [data for data in candidates if "#table-" in data.source]
+    if not tables:
+        return None
+    table = max(tables, key=lambda data: (len(words & {_singular(name) for name in data.names}),
+                                          len(data.records) * len(data.fields)))
+    # Words that name the table ("the districts table") are not column selections
+    table_words = {_singular(name) for name in table.names}
+    remaining = " ".join(word for word in _words(query) if _singular(word) not in table_words)
+    matched, unmatched = match_query_fields(table, remaining)
+    return None if matched or unmatched else table
@@ -0,0 +1,212 @@
+import contextvars
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field, asdict
+from typing import Any, Dict, Iterator, List, Optional
+
+@dataclass
+class Span:
+    """A timed stage of a request, e.g. navigation or a single LLM call"""
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str] = None
+    start_time: float = field(default_factory=time.time)
+    duration_ms: float = 0.0
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+@dataclass
+class Trace:
+    """All spans recorded while handling one request"""
+    name: str
+    trace_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    start_time: float = field(default_factory=time.time)
+    duration_ms: float = 0.0
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    spans: List[Span] = field(default_factory=list)
+
+    def breakdown(self) -> List[Dict[str, Any]]:
+        """Per-stage totals in the order the stages first ran"""
+        stages: Dict[str, Dict[str, Any]] = {}
+        for span in sorted(self.spans, key=lambda s: s.start_time):
+            stage = stages.setdefault(span.name, {"stage": span.name, "calls": 0, "total_ms": 0.0})
+            stage["calls"] += 1
+            stage["total_ms"] += span.duration_ms
+            for key in ("tokens_in", "tokens_out"):
+                if key in span.attributes:
+                    stage[key] = stage.get(key, 0) + span.attributes[key]
+        for stage in stages.values():
+            stage["total_ms"] = round(stage["total_ms"], 1)
+        return list(stages.values())
+
+    def format_breakdown(self) -> str:
+        lines = [f"{self.name} [{self.trace_id[:8]}] {self.duration_ms:.1f} ms"]
+        for stage in self.breakdown():
+            tokens = ""
+            if "tokens_in" in stage or "tokens_out" in stage:
+                tokens = f"  tokens in/out: {stage.get('tokens_in', 0)}/{stage.get('tokens_out', 0)}"
+            lines.append(f"  {stage['stage']:<20} x{stage['calls']:<3} {stage['total_ms']:>10.1f} ms{tokens}")
+        return "\n".join(lines)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+class JSONFileSink:
+    """Appends each finished trace as one JSON line"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, trace: Trace):
+        line = json.dumps(trace.to_dict(), default=str)
+        with self._lock:
+            with open(self.path, "a") as f:
+                f.write(line + "\n")
+
+class LoggingSink:
+    """Logs the per-stage breakdown of each trace to the console"""
+
+    def __init__(self, level: int = logging.INFO):
+        self.logger = logging.getLogger(__name__)
+        self.level = level
+
+    def export(self, trace: Trace):
+        self.logger.log(self.level, trace.format_breakdown())
+
+class OpenTelemetrySink:
+    """Replays finished traces into OpenTelemetry when the SDK is installed"""
+
+    def __init__(self, service_name: str = "cyberscraper"):
+        from opentelemetry import trace as otel_trace
+        self._otel_trace = otel_trace
+        self._tracer = otel_trace.get_tracer(service_name)
+
+    def export(self, trace: Trace):
+        to_ns = lambda seconds: int(seconds * 1e9)
+        root = self._tracer.start_span(trace.name, start_time=to_ns(trace.start_time), attributes=_otel_attributes(trace.attributes))
+        otel_spans = {None: root}
+        for span in sorted(trace.spans, key=lambda s: s.start_time):
+            parent = otel_spans.get(span.parent_id, root)
+            otel_span = self._tracer.start_span(
+                span.name,
+                context=self._otel_trace.set_span_in_context(parent),
+                start_time=to_ns(span.start_time),
+                attributes=_otel_attributes(span.attributes)
+            )
+            otel_span.end(end_time=to_ns(span.start_time + span.duration_ms / 1000))
+            otel_spans[span.span_id] = otel_span
+        root.end(end_time=to_ns(trace.start_time + trace.duration_ms / 1000))
+
+def _otel_attributes(attributes: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v if isinstance(v, (str, bool, int, float)) else str(v) for k, v in attributes.items()}
+
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("cyberscraper_trace", default=None)
+_current_span: contextvars.ContextVar = contextvars.ContextVar("cyberscraper_span", default=None)
+
+class Tracer:
+    def __init__(self, sinks: Optional[List[Any]] = None):
+        self.logger = logging.getLogger(__name__)
+        self.sinks = list(sinks or [])
+
+    def add_sink(self, sink: Any):
+        self.sinks.append(sink)
+
+    @property
+    def current_trace(self) -> Optional[Trace]:
+        return _current_trace.get()
+
+    @contextmanager
+    def trace(self, name: str, **attributes) -> Iterator[Trace]:
+        """Start a request trace; spans opened inside it (including in child tasks) are attached to it"""
+        trace = Trace(name=name, attributes=attributes)
+        trace_token = _current_trace.set(trace)
+        span_token = _current_span.set(None)
+        start = time.perf_counter()
+        try:
+            yield trace
+        finally:
+            trace.duration_ms = (time.perf_counter() - start) * 1000
+            _current_span.reset(span_token)
+            _current_trace.reset(trace_token)
+            self._export(trace)
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Span]:
+        """Time a stage; outside a trace the span is recorded nowhere"""
+        trace = _current_trace.get()
+        parent = _current_span.get()
+        span = Span(
+            name=name,
+            trace_id=trace.trace_id if trace else "",
+            span_id=uuid.uuid4().hex[:16],
+            parent_id=parent.span_id if parent else None,
+            attributes=attributes
+        )
+        token = _current_span.set(span)
+        start = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span.set_attribute("error", str(e) or type(e).__name__)
+            raise
+        finally:
+            span.duration_ms = (time.perf_counter() - start) * 1000
+            _current_span.reset(token)
+            if trace is not None:
+                trace.spans.append(span)
+
+    def _export(self, trace: Trace):
+        for sink in self.sinks:
+            try:
+                sink.export(trace)
+            except Exception as e:
+                self.logger.warning(f"Trace sink {type(sink).__name__} failed: {str(e)}")
+
+def _default_sinks() -> List[Any]:
+    sinks: List[Any] = [LoggingSink()]
+    trace_file = os.getenv("CYBERSCRAPER_TRACE_FILE")
+    if trace_file:
+        sinks.append(JSONFileSink(trace_file))
+    if os.getenv("CYBERSCRAPER_TRACE_OTEL", "").lower() in ("1", "true", "yes"):
+        try:
+            sinks.append(OpenTelemetrySink())
+        except ImportError:
+            logging.getLogger(__name__).warning("CYBERSCRAPER_TRACE_OTEL is set but opentelemetry is not installed")
+    return sinks
+
+_tracer = Tracer(_default_sinks())
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+def set_tracer(tracer: Tracer):
+    global _tracer
+    _tracer = tracer
+
+def main(argv: List[str]):
+    """Print the per-stage breakdown of traces written by JSONFileSink"""
+    if len(argv) != 1:
+        print("Usage: python -m src.utils.tracing <trace-file.jsonl>")
+        return 1
+    with open(argv[0]) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            data = json.loads(line)
+            trace = Trace(**{k: v for k, v in data.items() if k != "spans"},
+                          spans=[Span(**span) for span in data.get("spans", [])])
+            print(trace.format_breakdown())
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
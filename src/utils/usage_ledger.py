@@ -0,0 +1,106 @@
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Optional, Tuple
+
+# USD per 1M (prompt, completion) tokens; local Ollama models are free
+MODEL_PRICES: Dict[str, Tuple[float, float]] = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4": (30.00, 60.00),
+    "gpt-3.5-turbo": (0.50, 1.50),
+    "gemini-1.5-flash": (0.075, 0.30),
+    "gemini-pro": (0.50, 1.50),
+}
+
+def estimate_cost(model_name: str, prompt_tokens: int, completion_tokens: int) -> float:
+    prompt_price, completion_price = MODEL_PRICES.get(model_name, (0.0, 0.0))
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+class BudgetExceededError(Exception):
+    """Raised when a query cannot run without exceeding its token budget"""
+    pass
+
+@dataclass
+class UsageBudget:
+    """Token limits applied before LLM calls are made; None means unlimited"""
+    max_tokens_per_query: Optional[int] = None
+    max_tokens_per_session: Optional[int] = None
+
+    @classmethod
+    def from_env(cls) -> "UsageBudget":
+        def read(name: str) -> Optional[int]:
+            value = os.getenv(name)
+            return int(value) if value else None
+        return cls(
+            max_tokens_per_query=read("CYBERSCRAPER_MAX_TOKENS_PER_QUERY"),
+            max_tokens_per_session=read("CYBERSCRAPER_MAX_TOKENS_PER_SESSION"),
+        )
+
+@dataclass
+class UsageRecord:
+    model: str
+    url: Optional[str]
+    session_id: Optional[str]
+    prompt_tokens: int
+    completion_tokens: int
+    cost: float
+    timestamp: float = field(default_factory=time.time)
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+class UsageLedger:
+    """Process-wide record of tokens and estimated cost for every LLM call"""
+
+    GROUP_FIELDS = ("model", "url", "session_id")
+
+    def __init__(self, max_records: int = 10000):
+        self.records: Deque[UsageRecord] = deque(maxlen=max_records)
+        self._session_tokens: Dict[Optional[str], int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, model: str, prompt_tokens: int, completion_tokens: int,
+               url: Optional[str] = None, session_id: Optional[str] = None) -> UsageRecord:
+        record = UsageRecord(model, url, session_id, prompt_tokens, completion_tokens,
+                             estimate_cost(model, prompt_tokens, completion_tokens))
+        with self._lock:
+            self.records.append(record)
+            self._session_tokens[session_id] = self._session_tokens.get(session_id, 0) + record.total_tokens
+        return record
+
+    def session_tokens(self, session_id: Optional[str]) -> int:
+        with self._lock:
+            return self._session_tokens.get(session_id, 0)
+
+    def totals(self, group_by: Tuple[str, ...] = ("model",), **filters) -> Dict[Tuple, Dict[str, Any]]:
+        """Sum usage grouped by any of model, url and session_id, e.g. totals(("url",), session_id=chat_id)"""
+        unknown = set(group_by) - set(self.GROUP_FIELDS)
+        if unknown:
+            raise ValueError(f"Cannot group usage by: {', '.join(sorted(unknown))}")
+        with self._lock:
+            records = list(self.records)
+
+        groups: Dict[Tuple, Dict[str, Any]] = {}
+        for record in records:
+            if any(getattr(record, key) != value for key, value in filters.items()):
+                continue
+            key = tuple(getattr(record, name) for name in group_by)
+            group = groups.setdefault(key, {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost": 0.0})
+            group["calls"] += 1
+            group["prompt_tokens"] += record.prompt_tokens
+            group["completion_tokens"] += record.completion_tokens
+            group["cost"] += record.cost
+        return groups
+
+    def summary(self, **filters) -> Dict[str, Any]:
+        total = self.totals((), **filters).get((), {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost": 0.0})
+        total["total_tokens"] = total["prompt_tokens"] + total["completion_tokens"]
+        return total
+
+_ledger = UsageLedger()
+
+def get_usage_ledger() -> UsageLedger:
+    return _ledger
@@ -1,4 +1,5 @@
 from typing import Dict, Any, Optional, List, Tuple, Union
+import asyncio
 import json
 import pandas as pd
 from io import StringIO, BytesIO
@@ -6,25 +7,38 @@ import base64
 import re
 from functools import lru_cache
 import hashlib
-from .models import Models
+import logging
+import time
+import uuid
 from .ollama_models import OllamaModel, OllamaModelManager
 from .scrapers.playwright_scraper import PlaywrightScraper
 from .scrapers.html_scraper import HTMLScraper
-from .scrapers.json_scraper import JSONScraper
-from .utils.proxy_manager import ProxyManager
+from .scrapers.json_scraper import JSONScraper, INVALID_JSON
+from .scrapers.fetch_result import FetchErrorType, FetchResult
+from .utils.proxy_manager import get_proxy_manager
 from .utils.markdown_formatter import MarkdownFormatter
+from .utils.content_extractor import extract_main_content, resolve_aggressiveness
+from .utils.table_extractor import extract_tables, render_table, select_table_for_query
+from .utils.dedup import drop_duplicate_chunks, remove_repeated_blocks
+from .utils.chunk_merger import JSONChunkMerger
+from .utils.resource_pool import get_llm_client, get_playwright_scraper, get_tor_scraper, content_cache
+from .utils.structured_data import (StructuredData, compact_records, extract_embedded_payloads, extract_entity,
+                                    extract_records, project_records, query_names_type,
+                                    select_for_query)
+from .utils.tracing import get_tracer
+from .utils.usage_ledger import get_usage_ledger, UsageBudget, BudgetExceededError
 from .prompts import get_prompt_for_model
+from .model_registry import get_model_capabilities, get_chunk_size
+from .token_counter import get_token_counter
+from .llm_router import LLMRouter, invoke_with_retry, model_key
 from langchain.schema.runnable import RunnableSequence
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-import tiktoken
 import csv
 from bs4 import BeautifulSoup, Comment
 from .scrapers.playwright_scraper import PlaywrightScraper, ScraperConfig
 from urllib.parse import urlparse
 import streamlit as st
 import os
-import google.generativeai as genai
-from langchain_google_genai import ChatGoogleGenerativeAI
 from .scrapers.tor.tor_scraper import TorScraper
 from .scrapers.tor.tor_config import TorConfig
 from .scrapers.tor.exceptions import TorException
@@ -32,45 +46,76 @@ from .scrapers.tor.exceptions import TorException
 class WebExtractor:
     def __init__(self, model_name: str = "gpt-4o-mini", model_kwargs: Dict[str, Any] = None, 
                  proxy: Optional[str] = None, scraper_config: ScraperConfig = None,
-                 tor_config: TorConfig = None):
-        model_kwargs = model_kwargs or {}
-        if isinstance(model_name, str) and model_name.startswith("ollama:"):
-            self.model = OllamaModelManager.get_model(model_name[7:])
-        elif isinstance(model_name, OllamaModel):
-            self.model = model_name
-        elif model_name.startswith("gemini-"):
-            genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
-            self.model = ChatGoogleGenerativeAI(model=model_name, **model_kwargs)
-        else:
-            self.model = Models.get_model(model_name, **model_kwargs)
+                 tor_config: TorConfig = None, chat_id: Optional[str] = None,
+                 usage_budget: UsageBudget = None, fallback_models: Optional[List[str]] = None,
+                 hedge_requests: Optional[bool] = None, content_extraction: Optional[str] = None):
+        self.logger = logging.getLogger(__name__)
+        self.model = get_llm_client(model_name, model_kwargs)
         
         self.model_name = model_name
+        # Looked up on first use: for Ollama models this asks the server for the context window
+        self._capabilities = None
+        self._text_splitter = None
+        if fallback_models is None:
+            fallback_models = [m.strip() for m in os.getenv("CYBERSCRAPER_FALLBACK_MODELS", "").split(",") if m.strip()]
+        if hedge_requests is None:
+            hedge_requests = os.getenv("CYBERSCRAPER_HEDGE_REQUESTS", "").lower() in ("1", "true", "yes")
+        fallback_models = [m for m in fallback_models if m != model_name]
+        self.router = LLMRouter([model_name] + fallback_models, model_kwargs, hedge=hedge_requests) \
+            if fallback_models and isinstance(model_name, str) else None
         self.scraper_config = scraper_config or ScraperConfig()
-        self.playwright_scraper = PlaywrightScraper(config=self.scraper_config)
+        self.playwright_scraper = get_playwright_scraper(self.scraper_config)
         self.html_scraper = HTMLScraper()
         self.json_scraper = JSONScraper()
-        self.proxy_manager = ProxyManager(proxy)
+        self.proxy_manager = get_proxy_manager(proxy)
         self.markdown_formatter = MarkdownFormatter()
+        self.content_extraction = resolve_aggressiveness(content_extraction)
+        self.max_concurrent_chunks = max(int(os.getenv("CYBERSCRAPER_MAX_CONCURRENT_CHUNKS", "4")), 1)
         self.current_url = None
         self.current_content = None
         self.preprocessed_content = None
         self.conversation_history: List[str] = []
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=32000,
-            chunk_overlap=200,
-            length_function=self.num_tokens_from_string,
-        )
-        self.max_tokens = 128000 if model_name == "gpt-4o-mini" else 16385
         self.query_cache = {}
+        self.api_call_cache = {}
         self.content_hash = None
+        self.structured_data: List[StructuredData] = []
+        self.last_trace = None
+        self.session_id = chat_id or uuid.uuid4().hex
+        self.usage_budget = usage_budget or UsageBudget.from_env()
+        self.usage_ledger = get_usage_ledger()
         self.tor_config = tor_config or TorConfig()
-        self.tor_scraper = TorScraper(self.tor_config)
-
-    @staticmethod
-    def num_tokens_from_string(string: str) -> int:
-        encoding = tiktoken.encoding_for_model("gpt-4o-mini")
-        num_tokens = len(encoding.encode(string))
-        return num_tokens
+        self.tor_scraper = get_tor_scraper(self.tor_config)
+
+    @property
+    def capabilities(self):
+        if self._capabilities is None:
+            self._capabilities = get_model_capabilities(model_key(self.model_name))
+        return self._capabilities
+
+    @property
+    def chunk_size(self) -> int:
+        return get_chunk_size(self.capabilities)
+
+    @property
+    def max_tokens(self) -> int:
+        return self.capabilities.context_window
+
+    @property
+    def token_counter(self):
+        return get_token_counter(self.capabilities.tokenizer)
+
+    @property
+    def text_splitter(self) -> RecursiveCharacterTextSplitter:
+        if self._text_splitter is None:
+            self._text_splitter = RecursiveCharacterTextSplitter(
+                chunk_size=self.chunk_size,
+                chunk_overlap=200,
+                length_function=self.num_tokens_from_string,
+            )
+        return self._text_splitter
+
+    def num_tokens_from_string(self, string: str) -> int:
+        return self.token_counter.count(string)
 
     def _hash_content(self, content: str) -> str:
         return hashlib.md5(content.encode()).hexdigest()
@@ -82,32 +127,79 @@ class WebExtractor:
             domain = domain[4:]
         return domain.split('.')[0].capitalize()
 
-    @lru_cache(maxsize=100)
-    async def _cached_api_call(self, content_hash: str, query: str) -> str:
-        prompt_template = get_prompt_for_model(self.model_name)
-        full_prompt = prompt_template.format(webpage_content=self.preprocessed_content, query=query)
+    async def _cached_api_call(self, content_hash: str, query: str, content: Optional[str] = None) -> str:
+        content = self.preprocessed_content if content is None else content
+        cache_key = (content_hash, query)
+        if cache_key in self.api_call_cache:
+            return self.api_call_cache[cache_key]
+
+        prompt_template = get_prompt_for_model(model_key(self.model_name))
+        full_prompt = prompt_template.format(webpage_content=content, query=query)
         
-        if isinstance(self.model, OllamaModel):
-            return await self.model.generate(prompt=full_prompt)
-        else:
-            chain = prompt_template | self.model
-            response = await chain.ainvoke({"webpage_content": self.preprocessed_content, "query": query})
-            return response.content
+        with get_tracer().span("llm_call", model=model_key(self.model_name)) as span:
+            prompt_tokens = self.num_tokens_from_string(full_prompt)
+            span.set_attribute("tokens_in", prompt_tokens)
+            if self.router:
+                result, used_model = await self.router.generate(content, query, prompt_tokens)
+                span.set_attribute("routed_to", used_model)
+            else:
+                result = await invoke_with_retry(self.model, self.model_name, content, query, prompt_tokens)
+                used_model = model_key(self.model_name)
+            completion_tokens = self.num_tokens_from_string(result)
+            span.set_attribute("tokens_out", completion_tokens)
+
+        self.usage_ledger.record(used_model, prompt_tokens, completion_tokens,
+                                 url=self.current_url, session_id=self.session_id)
+
+        if len(self.api_call_cache) >= 100:
+            self.api_call_cache.pop(next(iter(self.api_call_cache)))
+        self.api_call_cache[cache_key] = result
+        return result
 
     async def process_query(self, user_input: str, progress_callback=None) -> str:
+        if self._capabilities is None:
+            # Resolved off the event loop; the capabilities property would block it on an Ollama lookup
+            self._capabilities = await asyncio.to_thread(get_model_capabilities, model_key(self.model_name))
+        with get_tracer().trace("process_query", query=user_input[:200]) as trace:
+            self.last_trace = trace
+            return await self._process_query(user_input, progress_callback)
+
+    @staticmethod
+    def _parse_url_message(user_input: str) -> Tuple[str, Optional[str], Optional[str], bool, bool]:
+        """(url, pages, url_pattern, handle_captcha, scroll) from a "<url> [pages] [pattern] [-flags]" message"""
+        parts = user_input.split()
+        url = parts[0]
+        pages = parts[1] if len(parts) > 1 and not parts[1].startswith('-') else None
+        url_pattern = parts[2] if len(parts) > 2 and not parts[2].startswith('-') else None
+        # Flags are whole words after the URL, so ".../infinite-scroll-demo" doesn't turn on scrolling
+        flags = {part.lower() for part in parts[1:]}
+        return url, pages, url_pattern, '-captcha' in flags, '-scroll' in flags
+
+    def restore_cached(self, user_input: str) -> bool:
+        """Load the page a URL message fetched from the content cache without fetching anything;
+        False when it is not cached (or needs a CAPTCHA, which is never cached)"""
+        url, pages, url_pattern, handle_captcha, scroll = self._parse_url_message(user_input)
+        cached = None if handle_captcha else content_cache.get((url, pages, url_pattern, scroll, self.content_extraction))
+        if not cached:
+            return False
+        self.current_url = url
+        self.current_content = cached.raw_content
+        self.preprocessed_content = cached.preprocessed_content
+        self.structured_data = cached.structured_data or []
+        self.content_hash = self._hash_content(self.preprocessed_content)
+        self.query_cache.clear()
+        return True
+
+    async def _process_query(self, user_input: str, progress_callback=None) -> str:
         if user_input.lower().startswith("http"):
-            parts = user_input.split(maxsplit=3)
-            url = parts[0]
-            pages = parts[1] if len(parts) > 1 and not parts[1].startswith('-') else None
-            url_pattern = parts[2] if len(parts) > 2 and not parts[2].startswith('-') else None
-            handle_captcha = '-captcha' in user_input.lower()
+            url, pages, url_pattern, handle_captcha, scroll = self._parse_url_message(user_input)
 
             website_name = self.get_website_name(url)
 
             if progress_callback:
                 progress_callback(f"Fetching content from {website_name}...")
 
-            response = await self._fetch_url(url, pages, url_pattern, handle_captcha, progress_callback)
+            response = await self._fetch_url(url, pages, url_pattern, handle_captcha, progress_callback, scroll)
         elif not self.current_content:
             response = "Please provide a URL first before asking for information."
         else:
@@ -122,37 +214,66 @@ class WebExtractor:
     async def _fetch_url(self, url: str, pages: Optional[str] = None, 
                         url_pattern: Optional[str] = None, 
                         handle_captcha: bool = False, 
-                        progress_callback=None) -> str:
+                        progress_callback=None,
+                        scroll: bool = False) -> str:
         self.current_url = url
+        cache_key = (url, pages, url_pattern, scroll, self.content_extraction)
+        failed = []
         
         try:
+            cached = None if handle_captcha else content_cache.get(cache_key)
+            if cached:
+                if progress_callback:
+                    progress_callback("Restoring cached content...")
+                self.current_content = cached.raw_content
+                self.structured_data = cached.structured_data or []
             # Check if it's an onion URL
-            if TorScraper.is_onion_url(url):
+            elif TorScraper.is_onion_url(url):
                 if progress_callback:
                     progress_callback("Fetching content through Tor network...")
                 
-                content = await self.tor_scraper.fetch_content(url)
+                with get_tracer().span("tor_fetch", url=url):
+                    content = await self.tor_scraper.fetch_content(url)
                 self.current_content = content
+                self.structured_data = await self._extract_structured_data([FetchResult(url, content=content)])
                 
             else:
                 # Regular scraping without Tor
                 if progress_callback:
                     progress_callback(f"Fetching content from {url}")
                 
-                # Don't use proxy for non-onion URLs
-                contents = await self.playwright_scraper.fetch_content(
+                # Each fetch gets its own browser context, so the pool rotates per context
+                proxy = await self.proxy_manager.get_proxy()
+                start = time.monotonic()
+                results = await self.playwright_scraper.fetch_content(
                     url, 
-                    proxy=None,  # Explicitly set proxy to None for regular URLs
+                    proxy=proxy,
                     pages=pages, 
                     url_pattern=url_pattern, 
-                    handle_captcha=handle_captcha
+                    handle_captcha=handle_captcha,
+                    scroll=scroll
                 )
-                self.current_content = "\n".join(contents)
-            
-            if progress_callback:
-                progress_callback("Preprocessing content...")
+                self._report_proxy_health(proxy, results, time.monotonic() - start)
+                failed = [result for result in results if not result.ok]
+                for result in failed:
+                    self.logger.warning(f"Skipping page {result.describe()}")
+                if len(failed) == len(results):
+                    return "Error fetching content: " + "; ".join(result.describe() for result in failed)
+                self.current_content = "\n".join(result.content for result in results if result.ok)
+                self.structured_data = await self._extract_structured_data(results)
             
-            self.preprocessed_content = self._preprocess_content(self.current_content)
+            if cached:
+                self.preprocessed_content = cached.preprocessed_content
+            else:
+                if progress_callback:
+                    progress_callback("Preprocessing content...")
+                with get_tracer().span("preprocess", input_chars=len(self.current_content),
+                                       content_extraction=self.content_extraction) as span:
+                    self.preprocessed_content = self._preprocess_content(self.current_content)
+                    span.set_attribute("output_chars", len(self.preprocessed_content))
+                if not failed:
+                    content_cache.set(cache_key, self.current_content, self.preprocessed_content,
+                                      self.structured_data)
             
             new_hash = self._hash_content(self.preprocessed_content)
             if self.content_hash != new_hash:
@@ -162,6 +283,7 @@ class WebExtractor:
             source_type = "Tor network" if TorScraper.is_onion_url(url) else "regular web"
             return f"I've fetched and preprocessed the content from {self.current_url} via {source_type}" + \
                 (f" (pages: {pages})" if pages else "") + \
+                (f", skipping {len(failed)} page(s) that failed to load" if failed else "") + \
                 ". What would you like to know about it?"
                 
         except TorException as e:
@@ -169,6 +291,17 @@ class WebExtractor:
         except Exception as e:
             return f"Error fetching content: {str(e)}"
 
+    def _report_proxy_health(self, proxy: Optional[str], results: List[FetchResult], elapsed: float):
+        if not proxy:
+            return
+        if any(result.ok for result in results):
+            self.proxy_manager.report_success(proxy, elapsed / len(results))
+            return
+        proxy_errors = [result for result in results if result.error_type in
+                        (FetchErrorType.CONNECTION, FetchErrorType.TIMEOUT, FetchErrorType.BOT_WALL)]
+        if proxy_errors:
+            self.proxy_manager.report_failure(proxy, proxy_errors[0].describe())
+
     def _preprocess_content(self, content: str) -> str:
         soup = BeautifulSoup(content, 'html.parser')
 
@@ -181,6 +314,24 @@ class WebExtractor:
         for tag in soup(["header", "footer", "nav", "aside"]):
             tag.decompose()
 
+        extract_main_content(soup, self.content_extraction)
+
+        # Sidebars and chrome that every page of a multi-page scrape repeats are kept once
+        if len(soup.find_all("html", recursive=False)) > 1:
+            with get_tracer().span("dedup_pages") as span:
+                removed = remove_repeated_blocks(soup)
+                removed_tokens = self.num_tokens_from_string("\n".join(removed)) if removed else 0
+                span.set_attribute("blocks_removed", len(removed))
+                span.set_attribute("tokens_removed", removed_tokens)
+            if removed:
+                self.logger.info(f"Removed {len(removed)} blocks repeated across pages (~{removed_tokens} tokens)")
+
+        # Data tables become one tab-separated line per row instead of one line per cell
+        for table in soup.find_all("table"):
+            rendered = render_table(table)
+            if rendered:
+                table.replace_with(f"\n{rendered}\n")
+
         for tag in soup.find_all():
             if len(tag.get_text(strip=True)) == 0:
                 tag.extract()
@@ -208,22 +359,148 @@ class WebExtractor:
         if cache_key in self.query_cache:
             return self.query_cache[cache_key]
         
-        content_tokens = self.num_tokens_from_string(self.preprocessed_content)
+        structured_answer = self._answer_from_structured_data(query)
+        if structured_answer is not None:
+            with get_tracer().span("format"):
+                formatted_result = self._format_result(structured_answer, query)
+            self.query_cache[cache_key] = formatted_result
+            return formatted_result
+
+        content = self._content_for_llm(query)
+        if content is not self.preprocessed_content:
+            content_hash = self._hash_content(content)
+
+        with get_tracer().span("tokenize") as span:
+            content_tokens = self.num_tokens_from_string(content)
+            span.set_attribute("tokens", content_tokens)
+
+        try:
+            token_budget = self._query_token_budget()
+        except BudgetExceededError as e:
+            return f"Error: {str(e)}"
+        prompt_overhead = self._prompt_overhead_tokens(query)
+        fits_budget = token_budget is None or content_tokens + prompt_overhead <= token_budget
         
-        if content_tokens <= self.max_tokens - 1000:
-            extracted_data = await self._cached_api_call(content_hash, query)
+        if content_tokens <= self.chunk_size and fits_budget:
+            extracted_data = await self._cached_api_call(content_hash, query, content)
         else:
-            chunks = self.optimized_text_splitter(self.preprocessed_content)
-            all_extracted_data = []
-            for i, chunk in enumerate(chunks):
-                chunk_data = await self._cached_api_call(self._hash_content(chunk), query)
-                all_extracted_data.append(chunk_data)
-            extracted_data = self._merge_json_chunks(all_extracted_data)
-
-        formatted_result = self._format_result(extracted_data, query)
+            with get_tracer().span("split") as span:
+                chunks = self.optimized_text_splitter(content)
+                span.set_attribute("chunks", len(chunks))
+            chunks = self._drop_duplicate_chunks(chunks)
+            try:
+                chunks = self._fit_chunks_to_budget(chunks, token_budget, prompt_overhead)
+            except BudgetExceededError as e:
+                return f"Error: {str(e)}"
+            extracted_data = await self._extract_chunks(chunks, query)
+
+        with get_tracer().span("format"):
+            formatted_result = self._format_result(extracted_data, query)
         self.query_cache[cache_key] = formatted_result
         return formatted_result
 
+    async def _extract_structured_data(self, results: List[FetchResult]) -> List[StructuredData]:
+        """Record lists and entities from captured API responses, from data embedded in the HTML
+        and from the page's data tables"""
+        payloads = []
+        for result in results:
+            if result.ok:
+                payloads.extend(extract_embedded_payloads(result.content, result.url))
+            for response in result.json_responses:
+                data = await self.json_scraper.extract(response.body)
+                if data != INVALID_JSON:
+                    payloads.append((response.url, data))
+        with get_tracer().span("structured_data", payloads=len(payloads)) as span:
+            structured_data = extract_records(payloads)
+            entity = extract_entity(payloads)
+            if entity:
+                structured_data.append(entity)
+            tables = extract_tables([(result.url, result.content) for result in results if result.ok])
+            structured_data.extend(tables)
+            span.set_attribute("tables", len(tables))
+            span.set_attribute("record_sets", len(structured_data))
+        return structured_data
+
+    def _answer_from_structured_data(self, query: str) -> Optional[str]:
+        """Records from captured or embedded structured data or a data table, when they hold every field
+        the query names or the query asks for a table as a whole"""
+        table = select_table_for_query(self.structured_data, query)
+        if table is not None:
+            self.logger.info(f"Answering from table {table.source} ({len(table.records)} rows), skipping the LLM")
+            return table.to_json()
+        selected = select_for_query(self.structured_data, query)
+        if not selected or selected[2]:
+            return None
+        data, matched, _ = selected
+        # A single entity usually describes the page (its publisher, the site) rather than the data
+        # asked for, so it only answers queries that name its type
+        if len(data.records) < 2 and not query_names_type(data, query):
+            return None
+        self.logger.info(f"Answering from {len(data.records)} structured records ({data.source}), skipping the LLM")
+        return data.to_json(matched) if len(data.records) > 1 else json.dumps(project_records(data.records, matched)[0])
+
+    def _content_for_llm(self, query: str) -> str:
+        """A compact summary of a record list instead of the page text, when it is smaller and holds
+        every term of the query; otherwise the preprocessed page. A single JSON-LD, microdata or meta
+        entity only describes the page, so it never replaces the page text."""
+        selected = select_for_query(self.structured_data, query)
+        if not selected:
+            return self.preprocessed_content
+        data, _, unmatched = selected
+        if len(data.records) < 2:
+            return self.preprocessed_content
+        compact = compact_records(data)
+        if len(compact) >= len(self.preprocessed_content):
+            return self.preprocessed_content
+        compact_lower = compact.lower()
+        if any(term not in compact_lower for term in unmatched):
+            return self.preprocessed_content
+        self.logger.info(f"Sending {len(data.records)} structured records ({data.source}) instead of the page text")
+        return compact
+
+    def _query_token_budget(self) -> Optional[int]:
+        """Tokens this query may spend, or None when no budget is configured"""
+        limits = []
+        if self.usage_budget.max_tokens_per_query is not None:
+            limits.append(self.usage_budget.max_tokens_per_query)
+        if self.usage_budget.max_tokens_per_session is not None:
+            remaining = self.usage_budget.max_tokens_per_session - self.usage_ledger.session_tokens(self.session_id)
+            if remaining <= 0:
+                raise BudgetExceededError(
+                    f"Session token budget of {self.usage_budget.max_tokens_per_session} tokens is used up.")
+            limits.append(remaining)
+        return min(limits) if limits else None
+
+    def _prompt_overhead_tokens(self, query: str) -> int:
+        prompt_template = get_prompt_for_model(model_key(self.model_name))
+        return self.num_tokens_from_string(prompt_template.format(webpage_content="", query=query))
+
+    def _fit_chunks_to_budget(self, chunks: List[str], token_budget: Optional[int], prompt_overhead: int) -> List[str]:
+        """Drop trailing chunks whose prompts would exceed the budget"""
+        if token_budget is None:
+            return chunks
+
+        planned_tokens = 0
+        kept = []
+        for chunk, chunk_tokens in zip(chunks, self.token_counter.count_batch(chunks)):
+            chunk_tokens += prompt_overhead
+            if planned_tokens + chunk_tokens > token_budget:
+                break
+            planned_tokens += chunk_tokens
+            kept.append(chunk)
+
+        if not kept:
+            raise BudgetExceededError(
+                f"This query needs more than the {token_budget} tokens left in its budget.")
+        if len(kept) < len(chunks):
+            self.logger.warning(f"Token budget of {token_budget} allows {len(kept)} of {len(chunks)} chunks; "
+                                f"extracting from the first {len(kept)} only")
+        return kept
+
+    def get_usage(self) -> Dict[str, Any]:
+        """Token and cost totals for this extractor's session"""
+        return self.usage_ledger.summary(session_id=self.session_id)
+
     def _format_result(self, extracted_data: str, query: str) -> Union[str, Tuple[str, pd.DataFrame], BytesIO]:
         try:
             json_data = json.loads(extracted_data)
@@ -252,18 +529,55 @@ class WebExtractor:
     def optimized_text_splitter(self, text: str) -> List[str]:
         return self.text_splitter.split_text(text)
 
+    def _drop_duplicate_chunks(self, chunks: List[str]) -> List[str]:
+        """Skip chunks that nearly repeat an earlier one, so repeated content is only paid for once"""
+        with get_tracer().span("dedup_chunks", chunks=len(chunks)) as span:
+            kept, dropped = drop_duplicate_chunks(chunks)
+            dropped_tokens = sum(self.token_counter.count_batch(dropped)) if dropped else 0
+            span.set_attribute("chunks_removed", len(dropped))
+            span.set_attribute("tokens_removed", dropped_tokens)
+        if dropped:
+            self.logger.info(f"Skipping {len(dropped)} near-duplicate chunks (~{dropped_tokens} tokens)")
+        return kept
+
+    async def _extract_chunks(self, chunks: List[str], query: str) -> str:
+        """Run the chunks through the LLM concurrently, merging each result as soon as it arrives"""
+        semaphore = asyncio.Semaphore(self.max_concurrent_chunks)
+        merger = JSONChunkMerger()
+
+        async def extract(index: int, chunk: str) -> Tuple[int, str]:
+            async with semaphore:
+                return index, await self._cached_api_call(self._hash_content(chunk), query, chunk)
+
+        tasks = [asyncio.ensure_future(extract(index, chunk)) for index, chunk in enumerate(chunks)]
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                index, chunk_data = await next_result
+                merger.add(index, chunk_data)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        return self._finish_merge(merger)
+
     def _merge_json_chunks(self, chunks: List[str]) -> str:
-        merged_data = []
-        for chunk in chunks:
-            try:
-                data = json.loads(chunk)
-                if isinstance(data, list):
-                    merged_data.extend(data)
-                else:
-                    merged_data.append(data)
-            except json.JSONDecodeError:
-                print(f"Error decoding JSON chunk: {chunk[:100]}...")
-        return json.dumps(merged_data)
+        merger = JSONChunkMerger()
+        for index, chunk in enumerate(chunks):
+            merger.add(index, chunk)
+        return self._finish_merge(merger)
+
+    def _finish_merge(self, merger: JSONChunkMerger) -> str:
+        with get_tracer().span("merge") as span:
+            merged = merger.result()
+            span.set_attribute("rows", len(merger.records))
+            span.set_attribute("rows_removed", merger.duplicates_removed)
+            span.set_attribute("fields_renamed", merger.fields_renamed)
+            span.set_attribute("invalid_chunks", merger.invalid_chunks)
+        if merger.duplicates_removed or merger.fields_renamed:
+            self.logger.info(f"Merged {merger.chunks_merged} chunks into {len(merger.records)} records, removing "
+                             f"{merger.duplicates_removed} duplicates and reconciling {merger.fields_renamed} field names")
+        return merged
 
     def _format_as_json(self, data: str) -> str:
         json_pattern = r'```json\s*([\s\S]*?)\s*```'
@@ -0,0 +1,162 @@
+import httplib2
+import pandas as pd
+import pytest
+from google.oauth2.credentials import Credentials
+from googleapiclient.errors import HttpError
+
+from src.utils import google_sheets_utils as sheets
+
+def http_error(status):
+    return HttpError(httplib2.Response({"status": status}), b"{}")
+
+class FakeRequest:
+    def __init__(self, service, kind, kwargs):
+        self.service = service
+        self.kind = kind
+        self.kwargs = kwargs
+
+    def execute(self):
+        self.service.calls.append((self.kind, self.kwargs))
+        if self.service.failures:
+            raise self.service.failures.pop(0)
+        return {"spreadsheetId": "sheet-1"} if self.kind == "create" else {}
+
+class FakeValues:
+    def __init__(self, service):
+        self.service = service
+
+    def append(self, **kwargs):
+        return FakeRequest(self.service, "append", kwargs)
+
+class FakeSpreadsheets:
+    def __init__(self, service):
+        self.service = service
+
+    def values(self):
+        return FakeValues(self.service)
+
+    def create(self, **kwargs):
+        return FakeRequest(self.service, "create", kwargs)
+
+class FakeService:
+    """Stands in for the Sheets API client: records every executed request and raises the queued
+    failures first"""
+
+    def __init__(self, failures=()):
+        self.calls = []
+        self.failures = list(failures)
+
+    def spreadsheets(self):
+        return FakeSpreadsheets(self)
+
+    def appended_rows(self):
+        return [kwargs["body"]["values"] for kind, kwargs in self.calls if kind == "append"]
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(sheets.time, "sleep", delays.append)
+    monkeypatch.setattr(sheets.random, "uniform", lambda low, high: 0.5)
+    return delays
+
+def test_batches_respect_row_limit(monkeypatch):
+    monkeypatch.setattr(sheets, "MAX_ROWS_PER_REQUEST", 3)
+    service = FakeService()
+    df = pd.DataFrame({"a": range(7), "b": range(7)})
+
+    sheets.append_rows(service, "sheet-1", df)
+
+    assert [len(batch) for batch in service.appended_rows()] == [3, 3, 1]
+    assert sum(service.appended_rows(), []) == df.values.tolist()
+
+def test_batches_respect_cell_limit(monkeypatch):
+    monkeypatch.setattr(sheets, "MAX_CELLS_PER_REQUEST", 10)
+    service = FakeService()
+    df = pd.DataFrame({name: range(5) for name in "abcd"})
+
+    sheets.append_rows(service, "sheet-1", df, include_header=True)
+
+    batches = service.appended_rows()
+    assert [len(batch) for batch in batches] == [2, 2, 2]
+    assert batches[0][0] == ["a", "b", "c", "d"]
+    assert all(len(batch) * 4 <= 10 for batch in batches)
+
+def test_append_request_arguments():
+    service = FakeService()
+    sheets.append_rows(service, "sheet-1", pd.DataFrame({"a": [1]}))
+
+    kind, kwargs = service.calls[0]
+    assert kind == "append"
+    assert kwargs["spreadsheetId"] == "sheet-1"
+    assert kwargs["range"] == sheets.SHEET_RANGE
+    assert kwargs["insertDataOption"] == "INSERT_ROWS"
+
+@pytest.mark.parametrize("status", [429, 500, 503])
+def test_retries_transient_errors_with_backoff(sleeps, status):
+    service = FakeService(failures=[http_error(status), http_error(status), http_error(status)])
+
+    sheets.append_rows(service, "sheet-1", pd.DataFrame({"a": [1, 2]}))
+
+    assert len(service.calls) == 4
+    assert sleeps == [1.5, 2.5, 4.5]
+
+def test_backoff_is_capped(monkeypatch, sleeps):
+    monkeypatch.setattr(sheets, "MAX_RETRIES", 8)
+    service = FakeService(failures=[http_error(429)] * 7)
+
+    sheets.execute_with_retry(service.spreadsheets().create(body={}))
+
+    assert sleeps[-1] == 32.5
+
+def test_gives_up_after_max_retries(sleeps):
+    service = FakeService(failures=[http_error(503)] * sheets.MAX_RETRIES)
+
+    with pytest.raises(HttpError):
+        sheets.execute_with_retry(service.spreadsheets().create(body={}))
+    assert len(service.calls) == sheets.MAX_RETRIES
+    assert len(sleeps) == sheets.MAX_RETRIES - 1
+
+def test_client_errors_are_not_retried(sleeps):
+    service = FakeService(failures=[http_error(400)])
+
+    with pytest.raises(HttpError):
+        sheets.execute_with_retry(service.spreadsheets().create(body={}))
+    assert len(service.calls) == 1
+    assert sleeps == []
+
+@pytest.fixture
+def fake_service(monkeypatch):
+    service = FakeService()
+    monkeypatch.setattr(sheets, "get_google_sheets_credentials", lambda: object())
+    monkeypatch.setattr(sheets, "get_sheets_service", lambda creds: service)
+    return service
+
+def test_append_to_google_sheets(fake_service):
+    df = pd.DataFrame({"name": ["a\nb", None], "price": [1.5, 2.0]})
+
+    assert sheets.append_to_google_sheets(df, "sheet-1", include_header=True)
+
+    assert fake_service.appended_rows() == [[["name", "price"], ["a b", "1.5"], ["", "2.0"]]]
+
+def test_append_to_google_sheets_reports_http_errors(fake_service, sleeps):
+    fake_service.failures = [http_error(403)]
+
+    assert sheets.append_to_google_sheets(pd.DataFrame({"a": [1]}), "sheet-1") is False
+
+def test_append_to_google_sheets_needs_credentials_and_a_dataframe(monkeypatch, fake_service):
+    assert sheets.append_to_google_sheets([["a"]], "sheet-1") is False
+    monkeypatch.setattr(sheets, "get_google_sheets_credentials", lambda: None)
+    assert sheets.append_to_google_sheets(pd.DataFrame({"a": [1]}), "sheet-1") is False
+    assert fake_service.calls == []
+
+def test_service_requests_do_not_share_a_connection(monkeypatch):
+    monkeypatch.setattr(sheets, "_service_cache", {})
+    creds = Credentials(token="token", refresh_token="refresh", client_id="client", client_secret="secret",
+                        token_uri="https://oauth2.googleapis.com/token")
+
+    service = sheets.get_sheets_service(creds)
+    first = service.spreadsheets().create(body={})
+    second = service.spreadsheets().create(body={})
+
+    assert sheets.get_sheets_service(creds) is service
+    assert first.http.http is not second.http.http
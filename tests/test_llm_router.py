@@ -0,0 +1,261 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from src import llm_router
+from src.llm_router import LLMRouter, get_status_code, is_fallback_error, is_rate_limit_error
+from src.model_registry import OLLAMA_DEFAULT_CAPABILITIES
+from src.ollama_models import OllamaModel
+from src.utils import rate_limiter
+from src.utils.rate_limiter import get_retry_after
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+class FakeClient(OllamaModel):
+    """Answers with the scripted outcomes in order: (delay, response) or (delay, exception)"""
+
+    def __init__(self, name, outcomes=()):
+        super().__init__(name, num_ctx=OLLAMA_DEFAULT_CAPABILITIES.context_window)
+        self.outcomes = list(outcomes)
+        self.calls = 0
+        self.cancelled = 0
+
+    async def generate(self, prompt, system_prompt=""):
+        self.calls += 1
+        delay, outcome = self.outcomes.pop(0) if self.outcomes else (0, f"{self.model_name} ok")
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+@pytest.fixture(autouse=True)
+def no_network_or_backoff(monkeypatch):
+    monkeypatch.setattr(llm_router, "get_model_capabilities", lambda name: OLLAMA_DEFAULT_CAPABILITIES)
+    monkeypatch.setattr(rate_limiter.random, "uniform", lambda low, high: 0.0)
+
+def make_router(*scripts, **kwargs):
+    names = [f"ollama:model-{index}" for index in range(len(scripts))]
+    router = LLMRouter(names, **kwargs)
+    router.clients = {name: FakeClient(name, script) for name, script in zip(names, scripts)}
+    return router, names
+
+def generate(router):
+    return asyncio.run(router.generate("content", "query"))
+
+@pytest.mark.parametrize("error", [StatusError(429), StatusError(500), StatusError(503), asyncio.TimeoutError()])
+def test_falls_back_on_transient_errors(error):
+    router, (primary, secondary) = make_router([(0, error)], [(0, "from secondary")])
+
+    assert generate(router) == ("from secondary", secondary)
+    assert router.clients[primary].calls == 1
+    assert router.health[primary].failures == 1
+    assert router.health[secondary].successes == 1
+
+def test_does_not_fall_back_on_client_errors():
+    router, (primary, secondary) = make_router([(0, StatusError(400))], [])
+
+    with pytest.raises(StatusError):
+        generate(router)
+    assert router.clients[secondary].calls == 0
+
+def test_last_model_retries_with_backoff():
+    router, (primary, secondary) = make_router([(0, StatusError(503))],
+                                               [(0, StatusError(503)), (0, StatusError(502)), (0, "recovered")])
+
+    assert generate(router) == ("recovered", secondary)
+    assert router.clients[secondary].calls == 3
+
+def test_rate_limit_starts_cooldown():
+    router, (primary, secondary) = make_router([(0, StatusError(429))], [], cooldown=30.0)
+
+    generate(router)
+
+    assert not router.health[primary].healthy
+    assert router.ordered_models() == [secondary, primary]
+    # The cooling model is skipped while it has a healthy alternative
+    assert generate(router) == (f"{secondary} ok", secondary)
+    assert router.clients[primary].calls == 1
+
+def test_repeated_failures_start_cooldown():
+    router, (primary, secondary) = make_router([(0, StatusError(500))] * 2, [], failure_threshold=2)
+
+    generate(router)
+    assert router.health[primary].healthy
+    generate(router)
+    assert not router.health[primary].healthy
+
+def test_model_returns_after_cooldown():
+    router, (primary, secondary) = make_router([(0, StatusError(429))], [], cooldown=30.0)
+    generate(router)
+
+    router.health[primary].unhealthy_until = time.monotonic() - 1
+    assert router.ordered_models() == [primary, secondary]
+    assert generate(router) == (f"{primary} ok", primary)
+    assert router.health[primary].consecutive_failures == 0
+
+def test_cooling_models_are_still_tried_last():
+    router, (primary, secondary) = make_router([(0, StatusError(429))], [(0, StatusError(429))] * 5)
+
+    with pytest.raises(StatusError):
+        generate(router)
+    assert router.ordered_models() == [primary, secondary]
+    assert not any(health.healthy for health in router.health.values())
+
+def test_latency_ewma():
+    router, (name,) = make_router([], ewma_alpha=0.5)
+
+    router._record_success(name, 1.0)
+    assert router.health[name].latency_ewma == 1.0
+    router._record_success(name, 3.0)
+    assert router.health[name].latency_ewma == 2.0
+    router._record_success(name, 0.0)
+    assert router.health[name].latency_ewma == 1.0
+    assert router.stats()[name]["latency_ewma"] == 1.0
+
+def test_p95_needs_enough_samples():
+    router, (name,) = make_router([])
+    for latency in (0.1, 0.2, 0.3, 0.4):
+        router._record_success(name, latency)
+    assert router.health[name].p95() is None
+    router._record_success(name, 0.5)
+    assert router.health[name].p95() == 0.5
+
+def test_hedges_once_primary_exceeds_p95():
+    router, (primary, secondary) = make_router([(2.0, "slow primary")], [(0, "fast secondary")], hedge=True)
+    for _ in range(10):
+        router._record_success(primary, 0.05)
+
+    start = time.monotonic()
+    assert generate(router) == ("fast secondary", secondary)
+    assert time.monotonic() - start < 1.0
+    assert router.clients[primary].cancelled == 1
+
+def test_no_hedge_within_p95():
+    router, (primary, secondary) = make_router([(0.01, "primary")], [], hedge=True)
+    for _ in range(10):
+        router._record_success(primary, 0.5)
+
+    assert generate(router) == ("primary", primary)
+    assert router.clients[secondary].calls == 0
+
+def test_hedge_uses_default_delay_without_history():
+    router, (primary, secondary) = make_router([(2.0, "slow primary")], [(0, "fast secondary")],
+                                               hedge=True, default_hedge_delay=0.05)
+
+    assert generate(router) == ("fast secondary", secondary)
+
+def test_failed_hedge_does_not_call_the_secondary_again():
+    router, (primary, secondary, third) = make_router([(0.2, StatusError(503))], [(0, StatusError(429))],
+                                                      [(0, "from third")], hedge=True, default_hedge_delay=0.05)
+
+    assert generate(router) == ("from third", third)
+    assert router.clients[secondary].calls == 1
+
+def test_failed_hedge_with_two_models_raises():
+    router, (primary, secondary) = make_router([(0.2, StatusError(503))], [(0, StatusError(503))] * 5,
+                                               hedge=True, default_hedge_delay=0.05)
+
+    with pytest.raises(StatusError):
+        generate(router)
+    assert router.clients[primary].calls == 1
+    assert router.clients[secondary].calls == 1
+
+def test_hedge_waits_for_primary_when_secondary_fails():
+    router, (primary, secondary) = make_router([(0.2, "primary")], [(0, StatusError(503))],
+                                               hedge=True, default_hedge_delay=0.05)
+
+    assert generate(router) == ("primary", primary)
+    assert router.health[secondary].failures == 1
+
+class OllamaStub(BaseHTTPRequestHandler):
+    """Local Ollama API: the model name picks the reply, e.g. "stub-429" is rate limited"""
+    calls = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        OllamaStub.calls.append((self.path, body["model"]))
+        if self.path == "/api/show":
+            self._reply(200, {"model_info": {"llama.context_length": 4096}})
+        elif body["model"] == "stub-429":
+            self._reply(429, {"error": "rate limited"}, {"Retry-After": "2"})
+        elif body["model"] == "stub-503":
+            self._reply(503, {"error": "overloaded"})
+        else:
+            self._reply(200, {"response": f"{body['model']} ok", "done": True})
+
+    def _reply(self, status, payload, headers=None):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def ollama_stub(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), OllamaStub)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    OllamaStub.calls = []
+    monkeypatch.setenv("OLLAMA_BASE_URL", f"http://127.0.0.1:{server.server_port}")
+    yield OllamaStub.calls
+    server.shutdown()
+    server.server_close()
+
+def stub_router(*models, **kwargs):
+    router = LLMRouter([f"ollama:{model}" for model in models], **kwargs)
+    # Pooled clients keep the base URL they were created with, so point them at this stub
+    router.clients = {name: OllamaModel(name[7:]) for name in router.model_names}
+    return router
+
+@pytest.mark.parametrize("model, status", [("stub-429", 429), ("stub-503", 503)])
+def test_http_errors_are_classified(ollama_stub, model, status):
+    with pytest.raises(requests.HTTPError) as caught:
+        asyncio.run(OllamaModel(model).generate("prompt"))
+
+    error = caught.value
+    assert get_status_code(error) == status
+    assert is_fallback_error(error)
+    assert is_rate_limit_error(error) == (status == 429)
+    assert get_retry_after(error) == (2.0 if status == 429 else None)
+
+@pytest.mark.parametrize("model", ["stub-429", "stub-503"])
+def test_falls_back_from_http_errors(ollama_stub, model):
+    router = stub_router(model, "stub-ok")
+
+    assert generate(router) == ("stub-ok ok", "ollama:stub-ok")
+    assert router.health[f"ollama:{model}"].failures == 1
+    assert ("/api/generate", model) in ollama_stub
+
+def test_rate_limited_model_cools_down(ollama_stub):
+    router = stub_router("stub-429", "stub-ok")
+
+    generate(router)
+    generate(router)
+
+    assert not router.health["ollama:stub-429"].healthy
+    assert ollama_stub.count(("/api/generate", "stub-429")) == 1
+
+def test_last_model_retries_http_errors(ollama_stub):
+    router = stub_router("stub-503")
+
+    with pytest.raises(requests.HTTPError):
+        generate(router)
+    assert ollama_stub.count(("/api/generate", "stub-503")) == rate_limiter.DEFAULT_MAX_RETRIES + 1